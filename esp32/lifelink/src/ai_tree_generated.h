@@ -2,111 +2,252 @@
 #pragma once
 #include <stdint.h>
 
-// Auto-generated decision tree inference for ESP32
-#include <stdint.h>
-
-// vital: 57 nodes
-const int16_t vital_feature[] = {
-  1, 11, 71, 10, 9, 0, -2, -2, -2, -2, 51, -2, -2, 17, -2, 47, -2, -2, 40, 1, 17, 53, -2, 39, -2, -2, 39, 77, -2, -2, 26, -2, -2, 17, 0, 42, -2, -2, 75, -2, -2, 60, -2, -2, 0, 77, -2, -2, 78, 1, 63, -2, -2, -2, 17, -2, -2
-};
-const float vital_threshold[] = {
-  0.1275, 0.5, 0.1, 1.5, 0.5, 0.11, -2, -2, -2, -2, 0.0333333, -2, -2, 0.5, -2, 0.1, -2, -2, 0.1, 0.1425, 0.5, 0.1, -2, 0.0333333, -2, -2, 0.0333333, 0.133333, -2, -2, 0.0333333, -2, -2, 2.5, 0.11, 0.1, -2, -2, 0.233333, -2, -2, 0.133333, -2, -2, 0.13, 0.0333333, -2, -2, 0.1, 0.1725, 0.1, -2, -2, -2, 0.5, -2, -2
-};
-const int16_t vital_left[] = {
-  1, 2, 3, 4, 5, 6, -1, -1, -1, -1, 11, -1, -1, 14, -1, 16, -1, -1, 19, 20, 21, 22, -1, 24, -1, -1, 27, 28, -1, -1, 31, -1, -1, 34, 35, 36, -1, -1, 39, -1, -1, 42, -1, -1, 45, 46, -1, -1, 49, 50, 51, -1, -1, -1, 55, -1, -1
+struct TreeNode {
+  int16_t child;
+  uint8_t feature;
+  uint8_t threshold;
 };
-const int16_t vital_right[] = {
-  18, 13, 10, 9, 8, 7, -1, -1, -1, -1, 12, -1, -1, 15, -1, 17, -1, -1, 44, 33, 26, 23, -1, 25, -1, -1, 30, 29, -1, -1, 32, -1, -1, 41, 38, 37, -1, -1, 40, -1, -1, 43, -1, -1, 48, 47, -1, -1, 54, 53, 52, -1, -1, -1, 56, -1, -1
+
+// q[i] = round(x[i] * TREE_FEATURE_SCALE[i]), clamped to 0..255 (tree thresholds use the same grid)
+static const float TREE_FEATURE_SCALE[82] = {
+  50, 200, 20, 1, 1, 255, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1
 };
-const uint8_t vital_leaf[] = {
-  255, 255, 255, 255, 255, 255, 0, 1, 1, 1, 255, 0, 1, 255, 1, 255, 0, 1, 255, 255, 255, 255, 1, 255, 0, 1, 255, 255, 0, 1, 255, 1, 0, 255, 255, 255, 1, 0, 255, 1, 0, 255, 0, 1, 255, 255, 0, 1, 255, 255, 255, 1, 0, 1, 255, 1, 0
+
+static inline void tree_quantize(const float* x, uint8_t* q) {
+  for (int i = 0; i < 82; ++i) {
+    const float v = x[i] * TREE_FEATURE_SCALE[i] + 0.5f;
+    q[i] = v <= 0.0f ? 0 : (v >= 255.0f ? 255 : (uint8_t)v);
+  }
+}
+
+// vital: 45 nodes
+const TreeNode vital_nodes[] = {
+  {1, 1, 25},
+  {3, 11, 0},
+  {5, 40, 1},
+  {7, 51, 1},
+  {9, 17, 0},
+  {11, 1, 28},
+  {13, 0, 6},
+  {15, 10, 1},
+  {17, 67, 0},
+  {0, 255, 1},
+  {19, 39, 0},
+  {21, 17, 0},
+  {23, 17, 2},
+  {25, 77, 0},
+  {0, 255, 1},
+  {27, 9, 0},
+  {0, 255, 1},
+  {0, 255, 0},
+  {0, 255, 1},
+  {0, 255, 0},
+  {0, 255, 1},
+  {29, 58, 2},
+  {31, 39, 0},
+  {33, 0, 6},
+  {0, 255, 0},
+  {0, 255, 0},
+  {0, 255, 1},
+  {35, 4, 0},
+  {0, 255, 1},
+  {0, 255, 1},
+  {0, 255, 0},
+  {37, 66, 0},
+  {39, 45, 0},
+  {41, 17, 0},
+  {43, 54, 2},
+  {0, 255, 0},
+  {0, 255, 0},
+  {0, 255, 0},
+  {0, 255, 1},
+  {0, 255, 0},
+  {0, 255, 1},
+  {0, 255, 1},
+  {0, 255, 1},
+  {0, 255, 1},
+  {0, 255, 1}
 };
 
-int8_t vital_predict(const float* x) {
+int8_t vital_predict_q(const uint8_t* q) {
   int16_t node = 0;
-  while (1) {
-    if (vital_leaf[node] != 255)
-      return (int8_t)vital_leaf[node];
-    int16_t f = vital_feature[node];
-    if (f < 0 || f >= 82) return -1;
-    if (x[f] <= vital_threshold[node])
-      node = vital_left[node];
-    else
-      node = vital_right[node];
+  while (vital_nodes[node].feature != 255) {
+    const TreeNode& n = vital_nodes[node];
+    node = n.child + (q[n.feature] > n.threshold);
   }
+  return (int8_t)vital_nodes[node].threshold;
 }
 
+int8_t vital_predict(const float* x) {
+  uint8_t q[82];
+  tree_quantize(x, q);
+  return vital_predict_q(q);
+}
 
-// vital: nodes=57 depth=6 ~627 bytes
 
-// intent: 45 nodes
-const int16_t intent_feature[] = {
-  15, 14, 9, 12, 13, 16, 10, 8, -2, -2, 37, -2, -2, -2, 62, 27, 21, -2, -2, -2, 42, 51, -2, -2, 35, -2, -2, 79, 27, -2, -2, 28, -2, -2, 47, 70, -2, 73, -2, -2, 63, -2, -2, -2, -2
-};
-const float intent_threshold[] = {
-  0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, -2, -2, 0.166667, -2, -2, -2, 0.0333333, 0.166667, 0.1, -2, -2, -2, 0.0333333, 0.1, -2, -2, 0.1, -2, -2, 0.0333333, 0.166667, -2, -2, 0.0333333, -2, -2, 0.233333, 0.166667, -2, 0.0333333, -2, -2, 0.0333333, -2, -2, -2, -2
-};
-const int16_t intent_left[] = {
-  1, 2, 3, 4, 5, 6, 7, 8, -1, -1, 11, -1, -1, -1, 15, 16, 17, -1, -1, -1, 21, 22, -1, -1, 25, -1, -1, 28, 29, -1, -1, 32, -1, -1, 35, 36, -1, 38, -1, -1, 41, -1, -1, -1, -1
-};
-const int16_t intent_right[] = {
-  44, 43, 34, 27, 14, 13, 10, 9, -1, -1, 12, -1, -1, -1, 20, 19, 18, -1, -1, -1, 24, 23, -1, -1, 26, -1, -1, 31, 30, -1, -1, 33, -1, -1, 40, 37, -1, 39, -1, -1, 42, -1, -1, -1, -1
-};
-const uint8_t intent_leaf[] = {
-  255, 255, 255, 255, 255, 255, 255, 255, 6, 5, 255, 3, 7, 7, 255, 255, 255, 2, 0, 1, 255, 255, 1, 2, 255, 8, 2, 255, 255, 0, 1, 255, 0, 2, 255, 255, 8, 255, 8, 4, 255, 4, 8, 4, 1
+// vital: nodes=45 depth=6 ~180 bytes
+
+// intent: 41 nodes
+const TreeNode intent_nodes[] = {
+  {1, 15, 0},
+  {3, 14, 0},
+  {0, 255, 1},
+  {5, 9, 0},
+  {0, 255, 4},
+  {7, 12, 0},
+  {9, 76, 3},
+  {11, 16, 0},
+  {13, 26, 2},
+  {15, 75, 2},
+  {17, 46, 1},
+  {19, 10, 0},
+  {0, 255, 7},
+  {21, 79, 0},
+  {0, 255, 2},
+  {0, 255, 8},
+  {0, 255, 4},
+  {0, 255, 4},
+  {0, 255, 8},
+  {23, 13, 0},
+  {25, 37, 2},
+  {27, 29, 2},
+  {29, 20, 0},
+  {31, 11, 0},
+  {33, 62, 0},
+  {35, 13, 0},
+  {37, 81, 0},
+  {0, 255, 0},
+  {39, 41, 1},
+  {0, 255, 0},
+  {0, 255, 2},
+  {0, 255, 5},
+  {0, 255, 6},
+  {0, 255, 2},
+  {0, 255, 2},
+  {0, 255, 3},
+  {0, 255, 1},
+  {0, 255, 7},
+  {0, 255, 3},
+  {0, 255, 1},
+  {0, 255, 0}
 };
 
-int8_t intent_predict(const float* x) {
+int8_t intent_predict_q(const uint8_t* q) {
   int16_t node = 0;
-  while (1) {
-    if (intent_leaf[node] != 255)
-      return (int8_t)intent_leaf[node];
-    int16_t f = intent_feature[node];
-    if (f < 0 || f >= 82) return -1;
-    if (x[f] <= intent_threshold[node])
-      node = intent_left[node];
-    else
-      node = intent_right[node];
+  while (intent_nodes[node].feature != 255) {
+    const TreeNode& n = intent_nodes[node];
+    node = n.child + (q[n.feature] > n.threshold);
   }
+  return (int8_t)intent_nodes[node].threshold;
 }
 
+int8_t intent_predict(const float* x) {
+  uint8_t q[82];
+  tree_quantize(x, q);
+  return intent_predict_q(q);
+}
 
-// intent: nodes=45 depth=8 ~495 bytes
 
-// urgency: 97 nodes
-const int16_t urgency_feature[] = {
-  13, 12, 75, 15, 2, 8, -2, -2, 10, -2, -2, 4, 25, -2, -2, 48, -2, -2, 8, 32, 23, -2, -2, 15, -2, -2, 54, 6, -2, -2, 8, -2, -2, 6, 61, 4, 64, -2, -2, -2, 75, 71, -2, -2, -2, 38, 43, -2, 24, -2, -2, -2, 9, 6, 55, 27, 70, -2, -2, 44, -2, -2, 12, 35, -2, -2, 26, -2, -2, 44, 65, 81, -2, -2, -2, 62, 60, -2, -2, -2, 27, 34, 45, 51, -2, -2, -2, 0, -2, 77, -2, -2, 1, 60, -2, -2, -2
-};
-const float urgency_threshold[] = {
-  0.5, 0.5, 0.0333333, 0.5, 0.025, 2.5, -2, -2, 0.5, -2, -2, 0.5, 0.1, -2, -2, 0.1, -2, -2, 0.5, 0.0333333, 0.0333333, -2, -2, 0.5, -2, -2, 0.1, 0.5, -2, -2, 1.5, -2, -2, 0.5, 0.0333333, 0.5, 0.1, -2, -2, -2, 0.0333333, 0.0333333, -2, -2, -2, 0.166667, 0.166667, -2, 0.0333333, -2, -2, -2, 0.5, 0.5, 0.0333333, 0.1, 0.166667, -2, -2, 0.0333333, -2, -2, 0.5, 0.0333333, -2, -2, 0.0333333, -2, -2, 0.0333333, 0.166667, 0.1, -2, -2, -2, 0.1, 0.1, -2, -2, -2, 0.1, 0.1, 0.1, 0.1, -2, -2, -2, 0.15, -2, 0.0333333, -2, -2, 0.2375, 0.0333333, -2, -2, -2
-};
-const int16_t urgency_left[] = {
-  1, 2, 3, 4, 5, 6, -1, -1, 9, -1, -1, 12, 13, -1, -1, 16, -1, -1, 19, 20, 21, -1, -1, 24, -1, -1, 27, 28, -1, -1, 31, -1, -1, 34, 35, 36, 37, -1, -1, -1, 41, 42, -1, -1, -1, 46, 47, -1, 49, -1, -1, -1, 53, 54, 55, 56, 57, -1, -1, 60, -1, -1, 63, 64, -1, -1, 67, -1, -1, 70, 71, 72, -1, -1, -1, 76, 77, -1, -1, -1, 81, 82, 83, 84, -1, -1, -1, 88, -1, 90, -1, -1, 93, 94, -1, -1, -1
-};
-const int16_t urgency_right[] = {
-  52, 33, 18, 11, 8, 7, -1, -1, 10, -1, -1, 15, 14, -1, -1, 17, -1, -1, 26, 23, 22, -1, -1, 25, -1, -1, 30, 29, -1, -1, 32, -1, -1, 45, 40, 39, 38, -1, -1, -1, 44, 43, -1, -1, -1, 51, 48, -1, 50, -1, -1, -1, 80, 69, 62, 59, 58, -1, -1, 61, -1, -1, 66, 65, -1, -1, 68, -1, -1, 75, 74, 73, -1, -1, -1, 79, 78, -1, -1, -1, 92, 87, 86, 85, -1, -1, -1, 89, -1, 91, -1, -1, 96, 95, -1, -1, -1
-};
-const uint8_t urgency_leaf[] = {
-  255, 255, 255, 255, 255, 255, 0, 2, 255, 2, 1, 255, 255, 2, 1, 255, 1, 2, 255, 255, 255, 0, 0, 255, 1, 2, 255, 255, 2, 2, 255, 1, 2, 255, 255, 255, 255, 1, 2, 1, 255, 255, 1, 2, 2, 255, 255, 2, 255, 1, 2, 1, 255, 255, 255, 255, 255, 2, 1, 255, 1, 2, 255, 255, 1, 1, 255, 1, 2, 255, 255, 255, 2, 2, 1, 255, 255, 2, 1, 0, 255, 255, 255, 255, 0, 1, 1, 255, 0, 255, 1, 0, 255, 255, 0, 1, 1
+// intent: nodes=41 depth=8 ~164 bytes
+
+// urgency: 77 nodes
+const TreeNode urgency_nodes[] = {
+  {1, 12, 0},
+  {3, 13, 0},
+  {5, 6, 0},
+  {7, 6, 0},
+  {9, 65, 1},
+  {11, 49, 1},
+  {13, 75, 2},
+  {15, 15, 0},
+  {17, 14, 0},
+  {19, 6, 0},
+  {21, 18, 0},
+  {23, 38, 1},
+  {0, 255, 2},
+  {25, 30, 2},
+  {0, 255, 1},
+  {27, 8, 1},
+  {29, 41, 1},
+  {31, 73, 0},
+  {33, 15, 1},
+  {35, 42, 0},
+  {37, 25, 1},
+  {39, 1, 52},
+  {41, 9, 0},
+  {43, 81, 0},
+  {0, 255, 1},
+  {45, 33, 1},
+  {0, 255, 1},
+  {47, 14, 0},
+  {49, 16, 0},
+  {51, 37, 0},
+  {53, 32, 0},
+  {55, 10, 0},
+  {57, 33, 1},
+  {59, 40, 0},
+  {0, 255, 2},
+  {61, 24, 0},
+  {63, 52, 0},
+  {65, 38, 1},
+  {0, 255, 1},
+  {67, 49, 1},
+  {0, 255, 1},
+  {69, 28, 0},
+  {0, 255, 1},
+  {71, 70, 0},
+  {0, 255, 2},
+  {73, 60, 2},
+  {75, 22, 0},
+  {0, 255, 0},
+  {0, 255, 0},
+  {0, 255, 2},
+  {0, 255, 0},
+  {0, 255, 2},
+  {0, 255, 2},
+  {0, 255, 2},
+  {0, 255, 1},
+  {0, 255, 2},
+  {0, 255, 1},
+  {0, 255, 1},
+  {0, 255, 0},
+  {0, 255, 0},
+  {0, 255, 1},
+  {0, 255, 1},
+  {0, 255, 2},
+  {0, 255, 1},
+  {0, 255, 2},
+  {0, 255, 2},
+  {0, 255, 1},
+  {0, 255, 0},
+  {0, 255, 0},
+  {0, 255, 0},
+  {0, 255, 2},
+  {0, 255, 2},
+  {0, 255, 2},
+  {0, 255, 2},
+  {0, 255, 1},
+  {0, 255, 1},
+  {0, 255, 2}
 };
 
-int8_t urgency_predict(const float* x) {
+int8_t urgency_predict_q(const uint8_t* q) {
   int16_t node = 0;
-  while (1) {
-    if (urgency_leaf[node] != 255)
-      return (int8_t)urgency_leaf[node];
-    int16_t f = urgency_feature[node];
-    if (f < 0 || f >= 82) return -1;
-    if (x[f] <= urgency_threshold[node])
-      node = urgency_left[node];
-    else
-      node = urgency_right[node];
+  while (urgency_nodes[node].feature != 255) {
+    const TreeNode& n = urgency_nodes[node];
+    node = n.child + (q[n.feature] > n.threshold);
   }
+  return (int8_t)urgency_nodes[node].threshold;
 }
 
+int8_t urgency_predict(const float* x) {
+  uint8_t q[82];
+  tree_quantize(x, q);
+  return urgency_predict_q(q);
+}
 
-// urgency: nodes=97 depth=6 ~1067 bytes
 
+// urgency: nodes=77 depth=6 ~308 bytes
 
 static const uint8_t INTENT_CLASS_COUNT = 9;
 static const char* const INTENT_CLASSES[] = {
@@ -120,3 +261,6 @@ static const char* const INTENT_CLASSES[] = {
   "SICKNESS",
   "WATER",
 };
+
+static const uint8_t URGENCY_CLASS_COUNT = 3;
+static const uint8_t URGENCY_CLASSES[] = {1, 2, 3};
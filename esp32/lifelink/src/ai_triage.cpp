@@ -206,9 +206,9 @@ void buildVector(const String& text, float* x) {
     uint32_t b = fnv1a32(gram, 4) % kNgramBins;
     x[kNgramStart + static_cast<int>(b)] += 1.0f;
   }
+  // Raw counts clipped to 0..15, matching vectorizer.ngram_counts (no rescale).
   for (int i = kNgramStart; i < kFeatureDim; ++i) {
     if (x[i] > 15.0f) x[i] = 15.0f;
-    x[i] /= 15.0f;
   }
 }
 }  // namespace
@@ -216,18 +216,21 @@ void buildVector(const String& text, float* x) {
 TriageOutput runTriage(const String& text) {
   float x[kFeatureDim];
   buildVector(text, x);
+  // Quantize once; all three trees compare against the same uint8 grid.
+  uint8_t q[kFeatureDim];
+  tree_quantize(x, q);
 
-  const int8_t vital_idx = vital_predict(x);
+  const int8_t vital_idx = vital_predict_q(q);
   const bool is_vital = vital_idx == 1;
   if (!is_vital) {
     return {false, text, "CHAT", 0, 0, 0, "unknown"};
   }
 
-  const int8_t intent_idx = intent_predict(x);
-  const int8_t urgency_idx = urgency_predict(x);
+  const int8_t intent_idx = intent_predict_q(q);
+  const int8_t urgency_idx = urgency_predict_q(q);
 
   const char* intent = (intent_idx >= 0 && intent_idx < INTENT_CLASS_COUNT) ? INTENT_CLASSES[intent_idx] : "INFO";
-  uint8_t urgency = (urgency_idx < 0) ? 2 : static_cast<uint8_t>(urgency_idx);
+  uint8_t urgency = (urgency_idx >= 0 && urgency_idx < URGENCY_CLASS_COUNT) ? URGENCY_CLASSES[urgency_idx] : 2;
   if (urgency > 3) urgency = 3;
 
   char norm[160];
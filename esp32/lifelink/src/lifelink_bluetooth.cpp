@@ -139,6 +139,10 @@ void LifeLinkBluetooth::onClientConnect() {
 
 void LifeLinkBluetooth::onClientDisconnect() {
   device_connected_ = false;
+  // Writes still queued belong to the client that just left; have the loop skip them.
+  rx_drop_to_ = rx_tail_;
+  __sync_synchronize();
+  rx_drop_pending_ = true;
   advertising_started_ = false;
   // Re-advertise immediately so setup can quickly switch to another node.
   startAdvertising();
@@ -153,10 +157,17 @@ void LifeLinkBluetooth::onMessageWritten(const uint8_t* data, size_t len) {
     return;
   if (len > kMessageBufferSize - 1)
     len = kMessageBufferSize - 1;
-  memcpy(message_buffer_, data, len);
-  message_buffer_[len] = '\0';
-  message_len_ = len;
-  state_ = BtState::kMessageReceived;
+  const size_t tail = rx_tail_;
+  const size_t next = (tail + 1) % kRxQueueDepth;
+  if (next == rx_head_) {
+    Serial.println("[BT] RX queue full; dropping write.");
+    return;
+  }
+  memcpy(rx_queue_[tail], data, len);
+  rx_queue_[tail][len] = '\0';
+  rx_queue_len_[tail] = len;
+  __sync_synchronize();  // publish the slot before advancing the tail
+  rx_tail_ = next;
 }
 
 void LifeLinkBluetooth::runStateDisconnected() {
@@ -184,7 +195,20 @@ void LifeLinkBluetooth::runStateConnecting() {
   }
 }
 
+void LifeLinkBluetooth::discardStaleWrites() {
+  if (!rx_drop_pending_)
+    return;
+  rx_drop_pending_ = false;
+  __sync_synchronize();
+  rx_head_ = rx_drop_to_;
+}
+
 void LifeLinkBluetooth::runStateStandby() {
+  discardStaleWrites();
+  if (rx_head_ != rx_tail_) {
+    state_ = BtState::kMessageReceived;
+    return;
+  }
   // Detect stale connections (e.g., gateway process killed without graceful disconnect).
   // If no BLE activity for kBleInactivityTimeoutMs, force-disconnect and re-advertise.
   const unsigned long now = millis();
@@ -203,6 +227,18 @@ void LifeLinkBluetooth::runStateStandby() {
 }
 
 void LifeLinkBluetooth::runStateMessageReceived() {
+  // Pop one queued write per tick so LoRa keeps getting serviced between commands.
+  discardStaleWrites();
+  const size_t head = rx_head_;
+  if (head == rx_tail_) {
+    state_ = BtState::kStandby;
+    return;
+  }
+  message_len_ = rx_queue_len_[head];
+  memcpy(message_buffer_, rx_queue_[head], message_len_ + 1);
+  __sync_synchronize();
+  rx_head_ = (head + 1) % kRxQueueDepth;
+
   // Run decision tree (callback); then return to standby.
   if (message_callback_) {
     message_callback_(message_buffer_, message_len_);
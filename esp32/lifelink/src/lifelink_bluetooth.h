@@ -21,6 +21,8 @@ class LifeLinkBluetooth {
   };
 
   static constexpr size_t kMessageBufferSize = 256;
+  // Writes queued between loop() ticks; the gateway pipelines HISTGET/MEMGET requests.
+  static constexpr size_t kRxQueueDepth = 8;
   static constexpr unsigned long kConnectAttemptIntervalMs = 30000;
 
   using MessageCallback = void (*)(const char* msg, size_t len);
@@ -51,6 +53,7 @@ class LifeLinkBluetooth {
   void runStateConnecting();
   void runStateStandby();
   void runStateMessageReceived();
+  void discardStaleWrites();
 
   static LifeLinkBluetooth* instance_;
   static void IRAM_ATTR onTimer();
@@ -63,6 +66,16 @@ class LifeLinkBluetooth {
   char message_buffer_[kMessageBufferSize];
   size_t message_len_ = 0;
 
+  // Single-producer (BLE task) / single-consumer (loop) ring of received writes.
+  char rx_queue_[kRxQueueDepth][kMessageBufferSize];
+  size_t rx_queue_len_[kRxQueueDepth] = {};
+  volatile size_t rx_head_ = 0;  // next slot to process
+  volatile size_t rx_tail_ = 0;  // next slot to fill
+  // Tail at the last disconnect; the loop moves rx_head_ here so writes from the old
+  // client never run for the next one (rx_head_ stays consumer-owned).
+  volatile size_t rx_drop_to_ = 0;
+  volatile bool rx_drop_pending_ = false;
+
   hw_timer_t* connect_timer_ = nullptr;
 
   BLEServer* ble_server_ = nullptr;
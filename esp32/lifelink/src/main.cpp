@@ -28,6 +28,49 @@ void hexEncode(const char* in, char* out, size_t out_size) {
   out[j] = '\0';
 }
 
+// Longest HISTBATCH answered in one go; a bigger count is cut to this and the gateway
+// asks again from where the batch stopped.
+constexpr uint16_t kHistBatchMax = 32;
+
+// OK|HIST|idx|dir|peer|msg_id|vital|intent|urgency|hexbody; false if idx is out of range.
+bool formatHistoryLine(uint16_t idx, char* out, size_t out_size) {
+  LifeLinkLoRaNode::MessageHistoryEntry entry{};
+  if (!g_lora_node.getMessageHistory(idx, &entry)) {
+    return false;
+  }
+  char body_hex[sizeof(entry.body) * 2 + 1];
+  hexEncode(entry.body, body_hex, sizeof(body_hex));
+  snprintf(
+      out,
+      out_size,
+      "OK|HIST|%u|%c|%04X|%u|%u|%s|%u|%s",
+      static_cast<unsigned>(idx),
+      entry.direction,
+      static_cast<unsigned>(entry.peer),
+      static_cast<unsigned>(entry.msg_id),
+      entry.vital ? 1U : 0U,
+      entry.intent,
+      static_cast<unsigned>(entry.urgency),
+      body_hex);
+  return true;
+}
+
+// Streams OK|HIST lines for start.. until count entries or the end of history, then
+// OK|HISTEND|<lines sent>.
+void sendHistoryRange(uint16_t start, uint16_t count) {
+  char out[220];
+  uint16_t sent = 0;
+  for (uint16_t i = 0; i < count; ++i) {
+    if (!formatHistoryLine(start + i, out, sizeof(out))) {
+      break;
+    }
+    g_bluetooth.sendText(out);
+    ++sent;
+  }
+  snprintf(out, sizeof(out), "OK|HISTEND|%u", static_cast<unsigned>(sent));
+  g_bluetooth.sendText(out);
+}
+
 void onBluetoothMessage(const char* msg, size_t len) {
   if (msg == nullptr || len == 0) {
     return;
@@ -137,30 +180,33 @@ void onBluetoothMessage(const char* msg, size_t len) {
 
   if (strncmp(cmd, "HISTGET|", 8) == 0) {
     const uint16_t idx = static_cast<uint16_t>(strtoul(cmd + 8, nullptr, 10));
-    LifeLinkLoRaNode::MessageHistoryEntry entry{};
-    if (!g_lora_node.getMessageHistory(idx, &entry)) {
+    char out[220];
+    if (!formatHistoryLine(idx, out, sizeof(out))) {
       g_bluetooth.sendText("ERR|HIST|range");
       return;
     }
-    char body_hex[sizeof(entry.body) * 2 + 1];
-    hexEncode(entry.body, body_hex, sizeof(body_hex));
-    char out[220];
-    snprintf(
-        out,
-        sizeof(out),
-        "OK|HIST|%u|%c|%04X|%u|%u|%s|%u|%s",
-        static_cast<unsigned>(idx),
-        entry.direction,
-        static_cast<unsigned>(entry.peer),
-        static_cast<unsigned>(entry.msg_id),
-        entry.vital ? 1U : 0U,
-        entry.intent,
-        static_cast<unsigned>(entry.urgency),
-        body_hex);
     g_bluetooth.sendText(out);
     return;
   }
 
+  if (strncmp(cmd, "HISTBATCH|", 10) == 0) {
+    // HISTBATCH|start|count -> one OK|HIST line per entry, then OK|HISTEND|<lines sent>
+    char* next = nullptr;
+    const uint16_t start = static_cast<uint16_t>(strtoul(cmd + 10, &next, 10));
+    uint16_t count = (next != nullptr && *next == '|') ? static_cast<uint16_t>(strtoul(next + 1, nullptr, 10)) : 0;
+    if (count > kHistBatchMax) {
+      count = kHistBatchMax;
+    }
+    sendHistoryRange(start, count);
+    return;
+  }
+
+  if (strcmp(cmd, "HISTALL") == 0) {
+    // Whole history (at most kMaxMessageHistory entries) in one stream.
+    sendHistoryRange(0, g_lora_node.messageHistoryCount());
+    return;
+  }
+
   g_bluetooth.sendText("ERR|CMD|unknown");
 }
 }
@@ -1,11 +1,20 @@
 """
 Export sklearn DecisionTree models to C++ for ESP32.
-Array-based traversal: feature index, threshold, left/right child, leaf class.
+Array-based traversal over one TreeNode array per tree (feature index, threshold,
+left/right child, leaf class). Nodes are emitted in breadth-first order; thresholds
+are uint8 and compared against the input quantized with tree_quantize().
+Callers running several trees can quantize once and use NAME_predict_q().
 """
+import io
+import sys
+
 import numpy as np
 from sklearn.tree import DecisionTreeClassifier
 
-# Sentinel for internal nodes in leaf_value array (255 = no leaf)
+from lib.vectorizer import FEATURE_SCALE
+
+# Sentinel for internal nodes in leaf_value array (255 = no leaf); in the emitted
+# TreeNode it marks leaves in the feature field instead.
 LEAF_SENTINEL = 255
 
 
@@ -17,46 +26,111 @@ def _tree_to_arrays(clf: DecisionTreeClassifier):
     threshold = np.array(t.threshold, dtype=np.float32)
     left = np.array(t.children_left, dtype=np.int16)
     right = np.array(t.children_right, dtype=np.int16)
-    # Leaf class: for leaves use argmax of value; for internal nodes use LEAF_SENTINEL
+    # Leaf class: for leaves use argmax of value; for internal nodes use LEAF_SENTINEL.
+    # t.value is (n_nodes, n_outputs=1, n_classes).
     leaf_value = np.full(n, LEAF_SENTINEL, dtype=np.uint8)
-    for i in range(n):
-        if t.children_left[i] == -1:  # leaf
-            leaf_value[i] = np.argmax(t.value[i][0])
+    leaves = t.children_left == -1
+    leaf_value[leaves] = t.value[leaves, 0, :].argmax(axis=1).astype(np.uint8)
     return feature, threshold, left, right, leaf_value
 
 
+def _quantize_thresholds(feature, threshold) -> np.ndarray:
+    """
+    uint8 thresholds on the FEATURE_SCALE grid. A feature value x = k / s satisfies
+    x <= t exactly when k <= T, T being the largest k whose float32 value k / s is
+    still <= t. Exact for every feature except the continuous caps ratio.
+    """
+    q = np.zeros(len(feature), dtype=np.uint8)
+    internal = np.flatnonzero(feature >= 0)
+    values = (np.arange(256)[None, :] / FEATURE_SCALE[feature[internal]][:, None]).astype(np.float32)
+    q[internal] = np.count_nonzero(values <= threshold[internal][:, None], axis=1) - 1
+    return q
+
+
+def _reorder_bfs(feature, threshold, left, right, leaf_value):
+    """
+    Renumber nodes breadth-first (root = 0, each node's children adjacent, each level
+    contiguous) so the top of the tree shares cache lines / flash pages. sklearn's
+    depth-first numbering puts a right child after the whole left subtree.
+    """
+    order = [0]
+    for old in order:  # grows while iterating: BFS queue
+        if left[old] != -1:
+            order.append(int(left[old]))
+            order.append(int(right[old]))
+    order = np.array(order, dtype=np.int64)
+    new_id = np.empty(len(order), dtype=np.int64)
+    new_id[order] = np.arange(len(order))
+
+    def _renumber(child):
+        child = child[order].copy()
+        internal = child != -1
+        child[internal] = new_id[child[internal]]
+        return child
+
+    return feature[order], threshold[order], _renumber(left), _renumber(right), leaf_value[order]
+
+
+# One node per struct: a traversal step reads a single 4-byte record. Thresholds are
+# uint8 on the FEATURE_SCALE grid, so each hop is an integer compare; the float input is
+# quantized once per prediction. Children are adjacent (BFS order), so a hop is
+# node = child + (q[feature] > threshold) with no branch. Leaves have
+# feature == LEAF_SENTINEL and store their class in threshold.
+NODE_STRUCT_CPP = """struct TreeNode {
+  int16_t child;
+  uint8_t feature;
+  uint8_t threshold;
+};"""
+
+
+def _emit_quantizer(n_features: int = 82) -> str:
+    scales = ", ".join(f"{float(v):g}" for v in FEATURE_SCALE[:n_features])
+    return f"""// q[i] = round(x[i] * TREE_FEATURE_SCALE[i]), clamped to 0..255 (tree thresholds use the same grid)
+static const float TREE_FEATURE_SCALE[{n_features}] = {{
+  {scales}
+}};
+
+static inline void tree_quantize(const float* x, uint8_t* q) {{
+  for (int i = 0; i < {n_features}; ++i) {{
+    const float v = x[i] * TREE_FEATURE_SCALE[i] + 0.5f;
+    q[i] = v <= 0.0f ? 0 : (v >= 255.0f ? 255 : (uint8_t)v);
+  }}
+}}"""
+
+
 def _emit_cpp_arrays(name_prefix: str, feature, threshold, left, right, leaf_value) -> str:
     n = len(feature)
-    lines = [
-        f"// {name_prefix}: {n} nodes",
-        f"const int16_t {name_prefix}_feature[] = {{",
-        "  " + ", ".join(str(int(feature[i])) for i in range(n)) + "\n};",
-        f"const float {name_prefix}_threshold[] = {{",
-        "  " + ", ".join(f"{float(threshold[i]):.6g}" for i in range(n)) + "\n};",
-        f"const int16_t {name_prefix}_left[] = {{",
-        "  " + ", ".join(str(int(left[i])) for i in range(n)) + "\n};",
-        f"const int16_t {name_prefix}_right[] = {{",
-        "  " + ", ".join(str(int(right[i])) for i in range(n)) + "\n};",
-        f"const uint8_t {name_prefix}_leaf[] = {{",
-        "  " + ", ".join(str(int(leaf_value[i])) for i in range(n)) + "\n};",
-    ]
-    return "\n".join(lines)
+    internal = left != -1
+    if np.any(right[internal] != left[internal] + 1):
+        raise ValueError("children must be adjacent; reorder nodes with _reorder_bfs first")
+    thr_q = _quantize_thresholds(feature, threshold)
+    # Plain Python ints per column (one tolist() each) rather than a numpy scalar per field
+    child = np.where(internal, left, 0).tolist()
+    feat = np.where(internal, feature, LEAF_SENTINEL).tolist()
+    thr = np.where(internal, thr_q, leaf_value).tolist()
+    out = io.StringIO()
+    out.write(f"// {name_prefix}: {n} nodes\n")
+    out.write(f"const TreeNode {name_prefix}_nodes[] = {{\n")
+    out.write(",\n".join([f"  {{{c}, {f}, {t}}}" for c, f, t in zip(child, feat, thr)]))
+    out.write("\n};")
+    return out.getvalue()
 
 
 def _emit_traverse_function(name_prefix: str, n_features: int = 82) -> str:
     return f"""
-int8_t {name_prefix}_predict(const float* x) {{
+int8_t {name_prefix}_predict_q(const uint8_t* q) {{
   int16_t node = 0;
-  while (1) {{
-    if ({name_prefix}_leaf[node] != {LEAF_SENTINEL})
-      return (int8_t){name_prefix}_leaf[node];
-    int16_t f = {name_prefix}_feature[node];
-    if (f < 0 || f >= {n_features}) return -1;
-    if (x[f] <= {name_prefix}_threshold[node])
-      node = {name_prefix}_left[node];
-    else
-      node = {name_prefix}_right[node];
+  while ({name_prefix}_nodes[node].feature != {LEAF_SENTINEL}) {{
+    const TreeNode& n = {name_prefix}_nodes[node];
+    node = n.child + (q[n.feature] > n.threshold);
   }}
+  return (int8_t){name_prefix}_nodes[node].threshold;
+}}
+
+int8_t {name_prefix}_predict(const float* x) {{
+  uint8_t q[{n_features}];
+  tree_quantize(x, q);
+  return {name_prefix}_predict_q(q);
 }}
 """
 
@@ -66,8 +140,9 @@ def export_tree_cpp(
     name_prefix: str,
     n_features: int = 82,
 ) -> str:
-    """Return C++ code for one tree (arrays + predict function)."""
-    feature, threshold, left, right, leaf_value = _tree_to_arrays(clf)
+    """Return C++ code for one tree (node array + predict functions). Needs NODE_STRUCT_CPP and
+    _emit_quantizer() output declared first."""
+    feature, threshold, left, right, leaf_value = _reorder_bfs(*_tree_to_arrays(clf))
     arrays = _emit_cpp_arrays(name_prefix, feature, threshold, left, right, leaf_value)
     traverse = _emit_traverse_function(name_prefix, n_features)
     return arrays + "\n" + traverse
@@ -84,8 +159,8 @@ def tree_stats(clf: DecisionTreeClassifier) -> dict:
             stack.append((t.children_left[node], d + 1))
             stack.append((t.children_right[node], d + 1))
     n = t.node_count
-    # Rough storage: feature 2B, threshold 4B, left 2B, right 2B, leaf 1B = 11B per node
-    bytes_per_node = 2 + 4 + 2 + 2 + 1
+    # One TreeNode: child 2B, feature 1B, threshold (or leaf class) 1B
+    bytes_per_node = 4
     return {
         "node_count": n,
         "max_depth": depth,
@@ -93,6 +168,22 @@ def tree_stats(clf: DecisionTreeClassifier) -> dict:
     }
 
 
+def _emit_intent_classes(classes) -> str:
+    """Label table for intent_predict(): the tree returns an index into clf.classes_."""
+    names = "\n".join(f'  "{c}",' for c in classes)
+    return f"""static const uint8_t INTENT_CLASS_COUNT = {len(classes)};
+static const char* const INTENT_CLASSES[] = {{
+{names}
+}};"""
+
+
+def _emit_urgency_classes(classes) -> str:
+    """urgency_predict() returns an index into clf.classes_ (e.g. 1..3 on the vital subset)."""
+    levels = ", ".join(str(int(c)) for c in classes)
+    return f"""static const uint8_t URGENCY_CLASS_COUNT = {len(classes)};
+static const uint8_t URGENCY_CLASSES[] = {{{levels}}};"""
+
+
 def export_all_trees(
     vital_clf: DecisionTreeClassifier,
     intent_clf: DecisionTreeClassifier | None,
@@ -100,21 +191,28 @@ def export_all_trees(
     n_features: int = 82,
 ) -> str:
     """Export vital gate + intent + urgency trees to a single C++ snippet."""
-    parts = [
-        "// Auto-generated decision tree inference for ESP32",
-        "#include <stdint.h>",
-        "",
-    ]
+    out = io.StringIO()
+
+    def section(code: str) -> None:
+        if out.tell():
+            out.write("\n\n")
+        out.write(code)
+
+    section("// Auto-generated from py_decision_tree. Do not edit manually.\n#pragma once\n#include <stdint.h>")
+    section(NODE_STRUCT_CPP)
+    section(_emit_quantizer(n_features))
     for name, clf in [("vital", vital_clf), ("intent", intent_clf), ("urgency", urg_clf)]:
         if clf is None:
             continue
-        parts.append(export_tree_cpp(clf, name, n_features))
-        parts.append("")
+        section(export_tree_cpp(clf, name, n_features))
         stats = tree_stats(clf)
-        parts.append(f"// {name}: nodes={stats['node_count']} depth={stats['max_depth']} ~{stats['estimated_bytes']} bytes")
-        parts.append("")
-
-    return "\n".join(parts)
+        section(f"// {name}: nodes={stats['node_count']} depth={stats['max_depth']} ~{stats['estimated_bytes']} bytes")
+    if intent_clf is not None:
+        section(_emit_intent_classes(intent_clf.classes_))
+    if urg_clf is not None:
+        section(_emit_urgency_classes(urg_clf.classes_))
+    out.write("\n")
+    return out.getvalue()
 
 
 if __name__ == "__main__":
@@ -122,4 +220,9 @@ if __name__ == "__main__":
 
     vital_clf, intent_clf, urg_clf = main(n_per_intent=200, n_normal=1500)
     cpp = export_all_trees(vital_clf, intent_clf, urg_clf)
-    print(cpp)
+    if len(sys.argv) > 1:
+        # e.g. python export_cpp.py ../esp32/lifelink/src/ai_tree_generated.h
+        with open(sys.argv[1], "w") as f:
+            f.write(cpp)
+    else:
+        print(cpp)
@@ -2,11 +2,20 @@
 Synthetic dataset generation for LoRa mesh AI triage.
 Templates, keyword lists, typo injection, and make_dataset(n_per_intent, n_normal, seed).
 """
-import random
-import re
-import string
-
+import numpy as np
 import pandas as pd
+from numba import njit
+
+# Extractor config lives in text_features; re-exported here with the other globals.
+from .text_features import (
+    CONFIRM_INTENTS,
+    LOC_CUES,
+    PLACE_TOKENS,
+    _extract_count,
+    _extract_location_token,
+    _needs_confirmation,
+    _needs_location,
+)
 
 # Vital intents (is_vital=True); CHAT is non-vital
 INTENTS = ["MEDIC", "WATER", "FOOD", "SHELTER", "DANGER", "EVAC", "INFO", "DISASTER", "SICKNESS", "CHAT"]
@@ -79,14 +88,6 @@ LOCATIONS = [
     "next to the school", "at the hospital",
 ]
 COUNTS = ["1", "2", "3", "5", "10"]
-PLACE_TOKENS = ["library", "bridge", "camp", "market", "hospital", "school"]
-
-# Location cues: if present in text, we assume location is given (needs_location = False)
-LOC_CUES = ["near", "at", "by", "behind", "next to", "coords", "gps", "location"]
-
-# Intents that require confirmation (e.g. DANGER/EVAC/DISASTER)
-CONFIRM_INTENTS = ["DANGER", "EVAC", "DISASTER"]
-
 # Words that signal urgency for label_urgency()
 URGENT_KEYWORDS = ["urgent", "asap", "immediately", "right away", "now"]
 
@@ -213,93 +214,135 @@ NORMAL_TEMPLATES = [
 ]
 
 
-def introduce_typos(word: str, p: float = 0.15) -> str:
-    if random.random() > p or len(word) < 4:
-        return word
-    w = list(word)
-    r = random.random()
-    if r < 0.33:
-        i = random.randrange(len(w))
-        del w[i]
-    elif r < 0.66:
-        i = random.randrange(max(1, len(w) - 1))
-        w[i], w[i + 1] = w[i + 1], w[i]
-    else:
-        i = random.randrange(len(w))
-        w[i] = random.choice(string.ascii_lowercase)
-    return "".join(w)
-
-
-def _apply_typos_to_tokens(s: str, typo_prob: float = 0.25) -> str:
-    tokens = re.findall(r"[a-zA-Z0-9']+|[^\w\s]", s.lower())
-    new_tokens = []
-    for t in tokens:
-        if re.match(r"[a-zA-Z]{4,}", t) and random.random() < typo_prob:
-            new_tokens.append(introduce_typos(t, p=0.6))
-        else:
-            new_tokens.append(t)
-    return " ".join(new_tokens).replace("  ", " ").strip()
-
+@njit
+def _seed_typos(seed):
+    np.random.seed(seed)
 
-def sample_sentence(intent: str) -> str:
-    loc = random.choice(LOCATIONS)
-    n = random.choice(COUNTS)
-    template = random.choice(TEMPLATES[intent])
-    s = template.format(loc=loc, n=n)
 
-    if random.random() < 0.35:
-        s += " " + random.choice(TIME_WORDS)
-    if random.random() < 0.25:
-        s += " please"
+@njit
+def _is_token_byte(c):
+    # [a-z0-9']
+    return (97 <= c <= 122) or (48 <= c <= 57) or c == 39
 
-    s = _apply_typos_to_tokens(s)
 
-    if random.random() < 0.15:
-        s += "!"
-    if random.random() < 0.10:
-        s += "?"
-    return s
-
-
-def sample_normal_sentence() -> str:
-    s = random.choice(NORMAL_TEMPLATES)
-    if random.random() < 0.2:
-        s = _apply_typos_to_tokens(s, typo_prob=0.15)
-    return s
+@njit
+def _inject_typos(buf, typo_prob, p):
+    """
+    Tokenize lowercase ASCII bytes like [a-z0-9']+|[^\w\s], join tokens with single
+    spaces, and mutate tokens starting with 4+ letters in place (delete/transpose/replace).
+    """
+    n = buf.shape[0]
+    out = np.empty(2 * n + 1, dtype=np.uint8)
+    o = 0
+    i = 0
+    while i < n:
+        c = buf[i]
+        if _is_token_byte(c):
+            j = i
+            while j < n and _is_token_byte(buf[j]):
+                j += 1
+            k = i
+            while k < j and 97 <= buf[k] <= 122:
+                k += 1
+            if o > 0:
+                out[o] = 32
+                o += 1
+            start = o
+            for t in range(i, j):
+                out[o] = buf[t]
+                o += 1
+            if k - i >= 4 and np.random.random() < typo_prob and np.random.random() <= p:
+                length = j - i
+                r = np.random.random()
+                if r < 0.33:
+                    idx = np.random.randint(0, length)
+                    for t in range(start + idx, o - 1):
+                        out[t] = out[t + 1]
+                    o -= 1
+                elif r < 0.66:
+                    idx = start + np.random.randint(0, length - 1)
+                    tmp = out[idx]
+                    out[idx] = out[idx + 1]
+                    out[idx + 1] = tmp
+                else:
+                    out[start + np.random.randint(0, length)] = 97 + np.random.randint(0, 26)
+            i = j
+        elif c == 32 or (9 <= c <= 13) or c == 95 or (65 <= c <= 90):
+            # whitespace and remaining \w bytes are dropped, as with re.findall
+            i += 1
+        else:
+            if o > 0:
+                out[o] = 32
+                o += 1
+            out[o] = c
+            o += 1
+            i += 1
+    return out[:o]
 
 
-def label_urgency(intent: str, sentence: str) -> int:
-    s = sentence.lower()
-    has_urgent = any(k in s for k in URGENT_KEYWORDS)
+def _apply_typos_to_tokens(s: str, typo_prob: float = 0.25) -> str:
+    buf = np.frombuffer(s.lower().encode("ascii", "ignore"), dtype=np.uint8)
+    return _inject_typos(buf, typo_prob, 0.6).tobytes().decode("ascii")
+
+
+def sample_sentences(intent: str, n: int, rng: np.random.Generator) -> list[str]:
+    """Sample n sentences for an intent; all template/suffix draws are made upfront."""
+    templates = TEMPLATES[intent]
+    template_idx = rng.integers(0, len(templates), size=n).tolist()
+    loc_idx = rng.integers(0, len(LOCATIONS), size=n).tolist()
+    count_idx = rng.integers(0, len(COUNTS), size=n).tolist()
+    time_idx = rng.integers(0, len(TIME_WORDS), size=n).tolist()
+    add_time = (rng.random(n) < 0.35).tolist()
+    add_please = (rng.random(n) < 0.25).tolist()
+    add_excl = (rng.random(n) < 0.15).tolist()
+    add_q = (rng.random(n) < 0.10).tolist()
+
+    out = []
+    for i in range(n):
+        s = templates[template_idx[i]].format(loc=LOCATIONS[loc_idx[i]], n=COUNTS[count_idx[i]])
+        if add_time[i]:
+            s += " " + TIME_WORDS[time_idx[i]]
+        if add_please[i]:
+            s += " please"
+
+        s = _apply_typos_to_tokens(s)
+
+        if add_excl[i]:
+            s += "!"
+        if add_q[i]:
+            s += "?"
+        out.append(s)
+    return out
+
+
+def sample_normal_sentences(n: int, rng: np.random.Generator) -> list[str]:
+    template_idx = rng.integers(0, len(NORMAL_TEMPLATES), size=n).tolist()
+    add_typos = (rng.random(n) < 0.2).tolist()
+    out = []
+    for i in range(n):
+        s = NORMAL_TEMPLATES[template_idx[i]]
+        if add_typos[i]:
+            s = _apply_typos_to_tokens(s, typo_prob=0.15)
+        out.append(s)
+    return out
+
+
+def label_urgency(intent: str, sentences: list[str], rng: np.random.Generator) -> np.ndarray:
+    """Urgency labels (0-3) for a batch of sentences of one intent."""
+    n = len(sentences)
+    has_urgent = np.fromiter(
+        (any(k in s.lower() for k in URGENT_KEYWORDS) for s in sentences), dtype=bool, count=n
+    )
+    r = rng.random(n)
     if intent in ["DANGER", "MEDIC", "DISASTER"]:
-        return 3 if (has_urgent or random.random() < 0.6) else 2
+        return np.where(has_urgent | (r < 0.6), 3, 2)
     if intent == "EVAC":
-        return 3 if (has_urgent or random.random() < 0.5) else 2
+        return np.where(has_urgent | (r < 0.5), 3, 2)
     if intent in ["WATER", "SHELTER", "FOOD", "SICKNESS"]:
-        return 2 if (has_urgent or random.random() < 0.3) else 1
+        return np.where(has_urgent | (r < 0.3), 2, 1)
     if intent == "INFO":
-        return 1 if random.random() < 0.8 else 2
-    return 0
-
-
-def _extract_count(norm: str) -> int:
-    m = re.search(r"\b(\d{1,2})\b", norm)
-    return int(m.group(1)) if m else 0
-
-
-def _extract_location_token(norm: str) -> str:
-    for place in PLACE_TOKENS:
-        if place in norm:
-            return place
-    return "unknown"
-
-
-def _needs_location(norm: str) -> bool:
-    return not any(cue in norm for cue in LOC_CUES)
-
-
-def _needs_confirmation(intent: str) -> bool:
-    return intent in CONFIRM_INTENTS
+        return np.where(r < 0.8, 1, 2)
+    return np.zeros(n, dtype=np.int64)
 
 
 def make_dataset(
@@ -310,55 +353,51 @@ def make_dataset(
     """
     Generate synthetic dataset with text, is_vital, intent, urgency, and optional fields.
     """
-    random.seed(seed)
-    rows = []
+    rng = np.random.default_rng(seed)
+    _seed_typos(seed)
+    frames = []
 
     # Vital intents
     for intent in VITAL_INTENTS:
-        for _ in range(n_per_intent):
-            sent = sample_sentence(intent)
-            urg = label_urgency(intent, sent)
-            norm = sent.lower()
-            rows.append({
-                "text": sent,
-                "is_vital": True,
-                "intent": intent,
-                "urgency": urg,
-                "needs_location": _needs_location(norm),
-                "needs_confirmation": _needs_confirmation(intent),
-                "count": _extract_count(norm),
-                "location_token": _extract_location_token(norm),
-            })
+        sents = sample_sentences(intent, n_per_intent, rng)
+        norms = [s.lower() for s in sents]
+        frames.append(pd.DataFrame({
+            "text": sents,
+            "is_vital": True,
+            "intent": intent,
+            "urgency": label_urgency(intent, sents, rng),
+            "needs_location": [_needs_location(t) for t in norms],
+            "needs_confirmation": _needs_confirmation(intent),
+            "count": [_extract_count(t) for t in norms],
+            "location_token": [_extract_location_token(t) for t in norms],
+        }))
 
     # CHAT intent (non-vital)
-    for _ in range(n_per_intent):
-        sent = sample_sentence("CHAT")
-        norm = sent.lower()
-        rows.append({
-            "text": sent,
-            "is_vital": False,
-            "intent": "CHAT",
-            "urgency": 0,
-            "needs_location": False,
-            "needs_confirmation": False,
-            "count": _extract_count(norm),
-            "location_token": _extract_location_token(norm),
-        })
+    sents = sample_sentences("CHAT", n_per_intent, rng)
+    norms = [s.lower() for s in sents]
+    frames.append(pd.DataFrame({
+        "text": sents,
+        "is_vital": False,
+        "intent": "CHAT",
+        "urgency": 0,
+        "needs_location": False,
+        "needs_confirmation": False,
+        "count": [_extract_count(t) for t in norms],
+        "location_token": [_extract_location_token(t) for t in norms],
+    }))
 
     # Extra normal (diverse chat / adversarial)
-    for _ in range(n_normal):
-        sent = sample_normal_sentence()
-        norm = sent.lower()
-        rows.append({
-            "text": sent,
-            "is_vital": False,
-            "intent": "CHAT",
-            "urgency": 0,
-            "needs_location": False,
-            "needs_confirmation": False,
-            "count": _extract_count(norm),
-            "location_token": "unknown",
-        })
-
-    random.shuffle(rows)
-    return pd.DataFrame(rows)
+    sents = sample_normal_sentences(n_normal, rng)
+    frames.append(pd.DataFrame({
+        "text": sents,
+        "is_vital": False,
+        "intent": "CHAT",
+        "urgency": 0,
+        "needs_location": False,
+        "needs_confirmation": False,
+        "count": [_extract_count(s.lower()) for s in sents],
+        "location_token": "unknown",
+    }))
+
+    df = pd.concat(frames, ignore_index=True)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
@@ -3,32 +3,90 @@ Inference wrapper and payload formatting.
 - If not vital: return full ASCII message for LoRa.
 - If vital: return compact schema payload (e.g. MEDIC|U3|F0|N2|Lbridge).
 """
-import re
+import weakref
+from dataclasses import dataclass
+from functools import lru_cache
 
 import numpy as np
+from numba import njit
 
-from .data_gen import CONFIRM_INTENTS, LOC_CUES, PLACE_TOKENS
-from .vectorizer import build_vector, normalize_text
+from .text_features import _extract_count, _extract_location_token, _needs_confirmation, _needs_location
+from .vectorizer import build_vector, build_vectors_batch, normalize_text
 
 
-def _needs_location(norm: str) -> bool:
-    return not any(cue in norm for cue in LOC_CUES)
+@njit
+def _predict(feature, threshold, left, right, leaf, x):
+    """Walk one tree from the root; same loop as the exported C++ *_predict()."""
+    node = 0
+    while left[node] != -1:
+        if x[feature[node]] <= threshold[node]:
+            node = left[node]
+        else:
+            node = right[node]
+    return leaf[node]
+
+
+@njit
+def _predict_batch(feature, threshold, left, right, leaf, X):
+    out = np.empty(X.shape[0], dtype=np.int64)
+    for i in range(X.shape[0]):
+        out[i] = _predict(feature, threshold, left, right, leaf, X[i])
+    return out
+
+
+@dataclass(frozen=True)
+class PyTree:
+    """Fitted sklearn DecisionTreeClassifier flattened to arrays for single-sample prediction."""
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    leaf: np.ndarray  # class index (argmax of node value) for every node
+    classes: np.ndarray
+
+    @classmethod
+    def from_sklearn(cls, clf) -> "PyTree":
+        t = clf.tree_
+        return cls(
+            feature=np.ascontiguousarray(t.feature, dtype=np.int64),
+            threshold=np.ascontiguousarray(t.threshold, dtype=np.float64),
+            left=np.ascontiguousarray(t.children_left, dtype=np.int64),
+            right=np.ascontiguousarray(t.children_right, dtype=np.int64),
+            leaf=t.value[:, 0, :].argmax(axis=1).astype(np.int64),
+            classes=clf.classes_,
+        )
+
+    def predict_one(self, x: np.ndarray):
+        """Class label for one FEATURE_DIM vector (same result as clf.predict(x[None])[0])."""
+        return self.classes[_predict(self.feature, self.threshold, self.left, self.right, self.leaf, x)]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Class labels for an (N, FEATURE_DIM) matrix (same result as clf.predict(X))."""
+        return self.classes[_predict_batch(self.feature, self.threshold, self.left, self.right, self.leaf, X)]
 
 
-def _needs_confirmation(intent: str) -> bool:
-    return intent in CONFIRM_INTENTS
+# classifier -> (clf.tree_ it was flattened from, PyTree); fit() swaps in a new tree_
+_PYTREES: "weakref.WeakKeyDictionary[object, tuple[object, PyTree]]" = weakref.WeakKeyDictionary()
 
 
-def _extract_count(norm: str) -> int:
-    m = re.search(r"\b(\d{1,2})\b", norm)
-    return int(m.group(1)) if m else 0
+def _as_pytree(clf) -> PyTree:
+    """PyTree for a fitted classifier, rebuilt only when the classifier is refit."""
+    if isinstance(clf, PyTree):
+        return clf
+    cached = _PYTREES.get(clf)
+    if cached is None or cached[0] is not clf.tree_:
+        cached = _PYTREES[clf] = (clf.tree_, PyTree.from_sklearn(clf))
+    return cached[1]
 
 
-def _extract_location_token(norm: str) -> str:
-    for place in PLACE_TOKENS:
-        if place in norm:
-            return place
-    return "unknown"
+@lru_cache(maxsize=2048)
+def _build_vector_cached(text: str, norm: str) -> np.ndarray:
+    """build_vector for triage; mesh traffic repeats a lot (ACKs, "copy", status lines).
+    The cached array is shared between calls, so it is returned read-only."""
+    x = build_vector(text, norm=norm)
+    x.flags.writeable = False
+    return x
 
 
 def format_vital_payload(
@@ -54,9 +112,11 @@ def triage(
     Run triage on text. Returns (is_vital, payload).
     - If is_vital is False: payload is None; send full ASCII `text` over LoRa.
     - If is_vital is True: payload is compact string; send payload over LoRa.
+    Classifiers may be fitted sklearn trees or PyTree; sklearn trees are flattened once and cached.
     """
-    x = build_vector(text).reshape(1, -1)
-    is_vital = bool(vital_clf.predict(x)[0])
+    norm = normalize_text(text)
+    x = _build_vector_cached(text, norm)
+    is_vital = bool(_as_pytree(vital_clf).predict_one(x))
 
     if not is_vital:
         return False, None  # Send full ASCII message
@@ -65,11 +125,10 @@ def triage(
     intent = "INFO"  # default
     urgency = 2
     if intent_clf is not None:
-        intent = intent_clf.predict(x)[0]
+        intent = str(_as_pytree(intent_clf).predict_one(x))
     if urg_clf is not None:
-        urgency = int(urg_clf.predict(x)[0])
+        urgency = int(_as_pytree(urg_clf).predict_one(x))
 
-    norm = normalize_text(text)
     needs_location = _needs_location(norm)
     needs_confirmation = _needs_confirmation(intent)
     count = _extract_count(norm)
@@ -86,10 +145,47 @@ def triage(
     return True, payload
 
 
+def triage_batch(
+    texts: list[str],
+    vital_clf,
+    intent_clf,
+    urg_clf,
+) -> list[tuple[bool, str | None]]:
+    """
+    triage() over many texts: one featurizer pass and one predict per tree for the whole
+    batch; intent/urgency and the payload extractors run on the vital rows only.
+    """
+    texts = list(texts)
+    results: list[tuple[bool, str | None]] = [(False, None)] * len(texts)
+    if not texts:
+        return results
+
+    X = build_vectors_batch(texts)
+    vital_rows = np.flatnonzero(_as_pytree(vital_clf).predict(X).astype(bool))
+    if vital_rows.size == 0:
+        return results
+
+    Xv = X[vital_rows]
+    intents = _as_pytree(intent_clf).predict(Xv) if intent_clf is not None else ["INFO"] * len(vital_rows)
+    urgencies = _as_pytree(urg_clf).predict(Xv) if urg_clf is not None else [2] * len(vital_rows)
+
+    for i, intent, urgency in zip(vital_rows.tolist(), intents, urgencies):
+        norm = normalize_text(texts[i])
+        intent = str(intent)
+        results[i] = True, format_vital_payload(
+            intent=intent,
+            urgency=int(urgency),
+            needs_location=_needs_location(norm),
+            needs_confirmation=_needs_confirmation(intent),
+            count=_extract_count(norm),
+            location_token=_extract_location_token(norm),
+        )
+    return results
+
+
 def run_inference_examples(vital_clf, intent_clf, urg_clf, sentences: list[str]) -> None:
     """Print triage result for each sentence."""
-    for s in sentences:
-        is_vital, payload = triage(s, vital_clf, intent_clf, urg_clf)
+    for s, (is_vital, payload) in zip(sentences, triage_batch(sentences, vital_clf, intent_clf, urg_clf)):
         if is_vital:
             print(f"  VITAL -> {payload}")
         else:
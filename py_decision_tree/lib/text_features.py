@@ -0,0 +1,48 @@
+"""
+Per-message extractors shared by data_gen (labels) and infer (payload fields):
+needs_location / needs_confirmation flags, count, and location token.
+Config for these lists lives here; data_gen re-exports it.
+"""
+import re
+
+import ahocorasick
+
+PLACE_TOKENS = ["library", "bridge", "camp", "market", "hospital", "school"]
+
+# Location cues: if present in text, we assume location is given (needs_location = False)
+LOC_CUES = ["near", "at", "by", "behind", "next to", "coords", "gps", "location"]
+
+# Intents that require confirmation (e.g. DANGER/EVAC/DISASTER)
+CONFIRM_INTENTS = ["DANGER", "EVAC", "DISASTER"]
+
+
+def _word_automaton(words: list[str]) -> ahocorasick.Automaton:
+    """Aho-Corasick automaton mapping each word to (list index, word)."""
+    ac = ahocorasick.Automaton()
+    for i, w in enumerate(words):
+        ac.add_word(w, (i, w))
+    ac.make_automaton()
+    return ac
+
+
+_COUNT_RE = re.compile(r"\b(\d{1,2})\b")
+_PLACES_AC = _word_automaton(PLACE_TOKENS)
+_LOC_CUES_AC = _word_automaton(LOC_CUES)
+
+
+def _needs_location(norm: str) -> bool:
+    return next(_LOC_CUES_AC.iter(norm), None) is None
+
+
+def _needs_confirmation(intent: str) -> bool:
+    return intent in CONFIRM_INTENTS
+
+
+def _extract_count(norm: str) -> int:
+    m = _COUNT_RE.search(norm)
+    return int(m.group(1)) if m else 0
+
+
+def _extract_location_token(norm: str) -> str:
+    # Lowest PLACE_TOKENS index wins (not earliest position), same as firmware.
+    return min((hit for _, hit in _PLACES_AC.iter(norm)), default=(len(PLACE_TOKENS), "unknown"))[1]
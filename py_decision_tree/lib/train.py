@@ -15,7 +15,7 @@ from sklearn.metrics import (
 )
 
 from .data_gen import make_dataset, VITAL_INTENTS
-from .vectorizer import build_vector
+from .vectorizer import build_vectors_batch
 
 
 def main(
@@ -33,8 +33,8 @@ def main(
     if test_seed is not None:
         df_train = make_dataset(n_per_intent=n_per_intent, n_normal=n_normal, seed=seed)
         df_test = make_dataset(n_per_intent=n_per_intent, n_normal=n_normal, seed=test_seed)
-        X_train = np.vstack([build_vector(t) for t in df_train["text"].tolist()])
-        X_test = np.vstack([build_vector(t) for t in df_test["text"].tolist()])
+        X_train = build_vectors_batch(df_train["text"])
+        X_test = build_vectors_batch(df_test["text"])
         yv_train = df_train["is_vital"].astype(int).values
         yv_test = df_test["is_vital"].astype(int).values
         yI_train = df_train["intent"].values
@@ -43,7 +43,7 @@ def main(
         yU_test = df_test["urgency"].values
     else:
         df = make_dataset(n_per_intent=n_per_intent, n_normal=n_normal, seed=seed)
-        X = np.vstack([build_vector(t) for t in df["text"].tolist()])
+        X = build_vectors_batch(df["text"])
         y_vital = df["is_vital"].astype(int).values
         y_intent = df["intent"].values
         y_urg = df["urgency"].values
@@ -65,16 +65,17 @@ def main(
     print("Confusion matrix:\n", confusion_matrix(yv_test, pred_vital))
 
     # --- 2) Intent and urgency on vital subset only ---
-    vital_mask_train = yv_train == 1
-    vital_mask_test = yv_test == 1
+    # Row indices of the vital subset, computed once and reused for X and both label arrays
+    vital_idx_train = np.flatnonzero(yv_train == 1)
+    vital_idx_test = np.flatnonzero(yv_test == 1)
 
-    if vital_mask_train.sum() == 0:
+    if vital_idx_train.size == 0:
         print("No vital samples in train; skipping intent/urgency models.")
         return vital_clf, None, None
 
-    X_train_vital = X_train[vital_mask_train]
-    yI_train_v = yI_train[vital_mask_train]
-    yU_train_v = yU_train[vital_mask_train]
+    X_train_vital = X_train[vital_idx_train]
+    yI_train_v = yI_train[vital_idx_train]
+    yU_train_v = yU_train[vital_idx_train]
 
     intent_clf = DecisionTreeClassifier(max_depth=max_depth_intent, random_state=seed)
     intent_clf.fit(X_train_vital, yI_train_v)
@@ -83,10 +84,10 @@ def main(
     urg_clf.fit(X_train_vital, yU_train_v)
 
     # Evaluate intent/urgency on test vital subset
-    if vital_mask_test.sum() > 0:
-        X_test_vital = X_test[vital_mask_test]
-        yI_test_v = yI_test[vital_mask_test]
-        yU_test_v = yU_test[vital_mask_test]
+    if vital_idx_test.size > 0:
+        X_test_vital = X_test[vital_idx_test]
+        yI_test_v = yI_test[vital_idx_test]
+        yU_test_v = yU_test[vital_idx_test]
         pred_I = intent_clf.predict(X_test_vital)
         pred_U = urg_clf.predict(X_test_vital)
         print("\n=== Intent (vital subset only) ===")
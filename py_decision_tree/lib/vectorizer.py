@@ -3,8 +3,13 @@ Text-to-vector encoding for decision tree input.
 82 dims: 8 structure + 10 keyword buckets + 64 hashed char 4-grams.
 """
 import re
+from collections.abc import Iterable
+from functools import lru_cache
 
+import ahocorasick
 import numpy as np
+import pandas as pd
+from numba import njit
 
 from .data_gen import BUCKETS, INTENTS, LOC_WORDS, TIME_WORDS
 
@@ -12,8 +17,39 @@ FEATURE_DIM = 82  # 8 structure + len(INTENTS) buckets + 64 ngrams
 STRUCTURE_DIM = 8
 NGRAM_BINS = 64
 NGRAM_START = STRUCTURE_DIM + len(INTENTS)  # 18
+NGRAM_CLIP = 15  # n-gram counts are clipped to 0..NGRAM_CLIP and stored as-is
 
+# x[i] * FEATURE_SCALE[i] is the integer the feature was built from (word count, digit
+# count, keyword count, clipped 4-gram count, ...). Only the caps ratio (5) is
+# continuous; it gets 8-bit resolution. export_cpp quantizes tree thresholds onto this grid.
+FEATURE_SCALE = np.array(
+    [50, 200, 20, 1, 1, 255, 1, 1] + [1] * len(INTENTS) + [1] * NGRAM_BINS,
+    dtype=np.float32,
+)
 
+
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """Aho-Corasick automaton mapping each bucket keyword to its bucket indices."""
+    kw_buckets: dict[str, list[int]] = {}
+    for bi, intent in enumerate(INTENTS):
+        for kw in BUCKETS[intent]:
+            kw_buckets.setdefault(kw, []).append(bi)
+    ac = ahocorasick.Automaton()
+    for kw, bis in kw_buckets.items():
+        ac.add_word(kw, (kw, tuple(bis)))
+    ac.make_automaton()
+    return ac
+
+
+KEYWORD_AC = _build_keyword_automaton()
+
+# Batch-path patterns (see build_vectors_batch). TIME_WORDS is matched as whole
+# tokens, so multi-word entries can never hit and are left out.
+_TIME_TOKEN_RE = r"(?<![^ ])(?:" + "|".join(re.escape(w) for w in TIME_WORDS if " " not in w) + r")(?![^ ])"
+_LOC_WORD_RE = "|".join(re.escape(kw) for kw in LOC_WORDS)
+
+
+@lru_cache(maxsize=2048)
 def normalize_text(text: str) -> str:
     t = text.lower()
     t = re.sub(r"[^a-z0-9\s]", " ", t)
@@ -21,23 +57,73 @@ def normalize_text(text: str) -> str:
     return t
 
 
-def fnv1a_32(s: str) -> int:
+@njit
+def _fnv1a_32(buf: np.ndarray, start: int, n: int) -> int:
     h = 0x811C9DC5
-    for ch in s.encode("utf-8"):
-        h ^= ch
+    for i in range(start, start + n):
+        h ^= buf[i]
         h = (h * 0x01000193) & 0xFFFFFFFF
     return h
 
 
-def build_vector(text: str, ngram_bins: int = NGRAM_BINS, ngram_n: int = 4) -> np.ndarray:
+def fnv1a_32(s: str) -> int:
+    buf = np.frombuffer(s.encode("utf-8"), dtype=np.uint8)
+    return _fnv1a_32(buf, 0, len(buf))
+
+
+@njit
+def hash_ngrams(buf: np.ndarray, n: int, bins: int) -> np.ndarray:
+    """
+    Histogram of FNV-1a hashes of every n-byte window of buf (n <= 7), skipping
+    all-space windows. The window is kept packed in an integer and updated in O(1)
+    per byte, together with a running count of its non-space bytes.
+    """
+    counts = np.zeros(bins, dtype=np.int64)
+    pow2 = (bins & (bins - 1)) == 0
+    keep = (1 << (8 * n)) - 1
+    w = 0
+    nonspace = 0
+    for i in range(buf.shape[0]):
+        b = buf[i]
+        if i >= n and buf[i - n] != 32:
+            nonspace -= 1
+        if b != 32:
+            nonspace += 1
+        w = ((w << 8) | b) & keep
+        if i < n - 1 or nonspace == 0:
+            continue
+        h = 0x811C9DC5
+        for k in range(n - 1, -1, -1):
+            h ^= (w >> (8 * k)) & 0xFF
+            h = (h * 0x01000193) & 0xFFFFFFFF
+        counts[h & (bins - 1) if pow2 else h % bins] += 1
+    return counts
+
+
+def build_vector(
+    text: str,
+    ngram_bins: int = NGRAM_BINS,
+    ngram_n: int = 4,
+    *,
+    norm: str | None = None,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
     """
-    Map text to FEATURE_DIM float vector for decision tree input.
+    Map text to FEATURE_DIM float vector for decision tree input. Structure features
+    are in [0, 1]; keyword and n-gram sections hold small integer counts.
+    Pass norm=normalize_text(text) when the caller already has it, and out= to fill a
+    preallocated float32 row (e.g. one row of a batch matrix) instead of allocating.
     """
     raw = text
-    norm = normalize_text(raw)
+    if norm is None:
+        norm = normalize_text(raw)
     words = norm.split() if norm else []
 
-    x = np.zeros(FEATURE_DIM, dtype=np.float32)
+    if out is None:
+        x = np.zeros(FEATURE_DIM, dtype=np.float32)
+    else:
+        x = out
+        x[:] = 0.0
 
     # Structure features (0..7)
     len_chars = len(norm)
@@ -50,7 +136,7 @@ def build_vector(text: str, ngram_bins: int = NGRAM_BINS, ngram_n: int = 4) -> n
     caps = [c for c in letters if c.isupper()]
     caps_ratio = (len(caps) / len(letters)) if letters else 0.0
 
-    has_time = 1.0 if any(w in norm.split() for w in TIME_WORDS) else 0.0
+    has_time = 1.0 if any(w in words for w in TIME_WORDS) else 0.0
     has_loc = 1.0 if any(kw in norm for kw in LOC_WORDS) else 0.0
 
     x[0] = min(len_words, 50) / 50.0
@@ -62,22 +148,79 @@ def build_vector(text: str, ngram_bins: int = NGRAM_BINS, ngram_n: int = 4) -> n
     x[6] = has_time
     x[7] = has_loc
 
-    # Keyword bucket counts (8..NGRAM_START-1)
-    for bi, intent in enumerate(INTENTS):
-        score = 0
-        for kw in BUCKETS[intent]:
-            if kw in norm:
-                score += 1
-        x[STRUCTURE_DIM + bi] = score
-
-    # Hashed char 4-grams (NGRAM_START .. FEATURE_DIM-1)
-    padded = " " + norm + " "
-    for i in range(max(0, len(padded) - ngram_n + 1)):
-        gram = padded[i : i + ngram_n]
-        if gram.strip() == "":
+    _keyword_counts(norm, x)
+    _ngram_counts(norm, x, ngram_bins, ngram_n)
+    return x
+
+
+def _keyword_counts(norm: str, x: np.ndarray) -> None:
+    """Keyword bucket counts (8..NGRAM_START-1): number of distinct bucket
+    keywords present in norm (repeats of the same keyword count once)."""
+    seen = set()
+    for _, (kw, bis) in KEYWORD_AC.iter(norm):
+        if kw in seen:
             continue
-        b = fnv1a_32(gram) % ngram_bins
-        x[NGRAM_START + b] += 1.0
+        seen.add(kw)
+        for bi in bis:
+            x[STRUCTURE_DIM + bi] += 1.0
 
-    x[NGRAM_START:] = np.clip(x[NGRAM_START:], 0, 15) / 15.0
-    return x
+
+def ngram_counts(norm: str, ngram_bins: int = NGRAM_BINS, ngram_n: int = 4) -> np.ndarray:
+    """Hashed char n-gram histogram of normalized text as uint8, clipped to 0..NGRAM_CLIP."""
+    # norm is [a-z0-9 ] only, so the ASCII bytes are the UTF-8 bytes being hashed.
+    padded = np.frombuffer((" " + norm + " ").encode("ascii"), dtype=np.uint8)
+    counts = hash_ngrams(padded, ngram_n, ngram_bins)
+    return np.minimum(counts, NGRAM_CLIP).astype(np.uint8)
+
+
+def _ngram_counts(norm: str, x: np.ndarray, ngram_bins: int, ngram_n: int) -> None:
+    """Hashed char 4-grams (NGRAM_START .. FEATURE_DIM-1): raw clipped counts, not rescaled.
+    Integer-valued features keep tree thresholds on half-integers, which export_cpp
+    stores exactly as uint8."""
+    x[NGRAM_START:] = ngram_counts(norm, ngram_bins, ngram_n)
+
+
+def build_vectors_batch(texts: Iterable[str], ngram_bins: int = NGRAM_BINS, ngram_n: int = 4) -> np.ndarray:
+    """
+    Map many texts to an (N, FEATURE_DIM) float matrix; row i equals build_vector(texts[i]).
+    Normalization and structure features run as column-wise pandas string ops. The
+    character-class counts there are ASCII-only, so non-ASCII rows go through build_vector.
+    """
+    raw = pd.Series(list(texts), dtype=object)
+    n = len(raw)
+    X = np.zeros((n, FEATURE_DIM), dtype=np.float32)
+    if n == 0:
+        return X
+
+    norm = (
+        raw.str.lower()
+        .str.replace(r"[^a-z0-9\s]", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+    # Structure features (0..7), same formulas as build_vector
+    len_chars = norm.str.len().to_numpy()
+    len_words = norm.str.count(" ").to_numpy() + (len_chars > 0)
+    num_digits = raw.str.count(r"[0-9]").to_numpy()
+    letters = raw.str.count(r"[A-Za-z]").to_numpy()
+    caps = raw.str.count(r"[A-Z]").to_numpy()
+    caps_ratio = np.divide(caps, letters, out=np.zeros(n), where=letters > 0)
+
+    X[:, 0] = np.minimum(len_words, 50) / 50.0
+    X[:, 1] = np.minimum(len_chars, 200) / 200.0
+    X[:, 2] = np.minimum(num_digits, 20) / 20.0
+    X[:, 3] = raw.str.contains("!", regex=False).to_numpy()
+    X[:, 4] = raw.str.contains("?", regex=False).to_numpy()
+    X[:, 5] = np.minimum(caps_ratio * 10.0, 1.0)
+    X[:, 6] = norm.str.contains(_TIME_TOKEN_RE, regex=True).to_numpy()
+    X[:, 7] = norm.str.contains(_LOC_WORD_RE, regex=True).to_numpy()
+
+    is_ascii = raw.map(str.isascii).to_numpy()
+    for i, (t, nt) in enumerate(zip(raw.tolist(), norm.tolist())):
+        if not is_ascii[i]:
+            build_vector(t, ngram_bins=ngram_bins, ngram_n=ngram_n, norm=nt, out=X[i])
+            continue
+        _keyword_counts(nt, X[i])
+        _ngram_counts(nt, X[i], ngram_bins, ngram_n)
+    return X
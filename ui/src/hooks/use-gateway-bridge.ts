@@ -33,6 +33,14 @@ export interface GatewayMessageHistory {
   body: string;
 }
 
+/** GET /messages: one header plus a row tuple per history entry, in MESSAGE_COLUMNS order. */
+export type GatewayMessageRow = [number, "S" | "R", string, number, boolean, string, number, string];
+
+export interface GatewayMessageRows {
+  columns: (keyof GatewayMessageHistory)[];
+  rows: GatewayMessageRow[];
+}
+
 export interface GatewayMember {
   idx: number;
   node_id: string;
@@ -97,6 +105,16 @@ function messagesEqual(
   return la.idx === lb.idx && la.msg_id === lb.msg_id && la.direction === lb.direction;
 }
 
+/** Rebuild history objects from the column-oriented GET /messages payload. */
+function decodeMessageRows(data: GatewayMessageRows): GatewayMessageHistory[] {
+  const { columns, rows } = data;
+  return rows.map((row) => {
+    const entry: Record<string, unknown> = {};
+    for (let i = 0; i < columns.length; i++) entry[columns[i]] = row[i];
+    return entry as unknown as GatewayMessageHistory;
+  });
+}
+
 function isAbort(e: unknown): boolean {
   return e instanceof DOMException && e.name === "AbortError";
 }
@@ -231,6 +249,16 @@ export function useGatewayBridge() {
     [rawFetch],
   );
 
+  const refreshMessages = useCallback(async () => {
+    const myEpoch = epochRef.current;
+    const data = await rawFetch<GatewayMessageRows>("/messages", {
+      signal: abortRef.current.signal,
+    });
+    if (epochRef.current !== myEpoch) return;
+    const next = decodeMessageRows(data);
+    setMessageHistory((prev) => (messagesEqual(prev, next) ? prev : next));
+  }, [rawFetch]);
+
   const clearMessages = useCallback(async () => {
     await rawFetch<{ ok: boolean }>("/clear-messages", { method: "POST" });
     setMessageHistory([]);
@@ -283,7 +311,7 @@ export function useGatewayBridge() {
           if (isAbort(e) || epochRef.current !== myEpoch) return;
         }
 
-        // Messages are fetched only on user request (Refresh Messages button)
+        // Messages are fetched only on user request (refreshMessages)
       } finally {
         tickRunning.current = false;
       }
@@ -308,6 +336,7 @@ export function useGatewayBridge() {
     connect,
     disconnect,
     command,
+    refreshMessages,
     clearMessages,
   };
 }
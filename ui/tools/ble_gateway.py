@@ -12,17 +12,28 @@ Runs a localhost HTTP API that the Next.js /bridge page can call:
 from __future__ import annotations
 
 import asyncio
+from binascii import a2b_hex
+import heapq
 import os
+import queue
 import sys
+import threading
 import time
-from collections import deque
-from dataclasses import dataclass, asdict
-from typing import Any
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+from typing import Annotated, Any, AsyncIterator, TypeVar
 
 from bleak import BleakClient, BleakScanner
-from fastapi import FastAPI, HTTPException
+from bleak.exc import BleakError
+from bleak.backends.characteristic import BleakGATTCharacteristic
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+import msgspec
 import uvicorn
 
 # Add repo root so we can import py_decision_tree
@@ -44,6 +55,18 @@ BLE_TIMEOUT_FIRST = 2.0    # first command right after connect
 BLE_TIMEOUT_NORMAL = 0.8   # normal command timeouts
 BLE_TIMEOUT_FAST = 0.5     # fast simple lookups (HISTGET etc. after warm link)
 
+# HISTGET/MEMGET writes kept in flight at once; replies echo the index, so they are
+# matched per index. Firmware with HISTBATCH queues up to 7 writes between loop() ticks
+# (an 8-slot ring); older builds keep a single RX buffer, so connect() probes with an
+# empty HISTBATCH and a node gets the window only once it has answered it.
+BLE_PIPELINE_WINDOW = 4
+BLE_PIPELINE_PER_ITEM_S = 0.05  # batch time budget per index (full window) on top of one retry cycle
+
+# Firmware limits for streamed history (kMaxMessageHistory / kHistBatchMax in the ESP32 code);
+# a stream's end marker is waited for one reply timeout plus BLE_PIPELINE_PER_ITEM_S per line.
+HISTORY_MAX_ENTRIES = 64
+HISTBATCH_MAX_ENTRIES = 32
+
 # ---------------------------------------------------------------------------
 # Single global lock for ALL outgoing Bluetooth operations (connect, send,
 # disconnect).  Every code path that touches the BLE adapter acquires this
@@ -51,6 +74,45 @@ BLE_TIMEOUT_FAST = 0.5     # fast simple lookups (HISTGET etc. after warm link)
 # ---------------------------------------------------------------------------
 _ble_lock = asyncio.Lock()
 
+LOG_CAPACITY = 300
+
+# Set LIFELINK_LOG_MESSAGES=1 to echo every newly fetched history row to the log.
+LOG_MESSAGES = os.environ.get("LIFELINK_LOG_MESSAGES") == "1"
+
+# The UI polls /messages and /members on a timer; a poll inside this window of the last
+# device round-trip gets that result back without touching BLE.
+POLL_CACHE_TTL_S = 1.5
+
+# /messages is column-oriented: one header plus a tuple per history row (no per-row dicts).
+MESSAGE_COLUMNS = ("idx", "direction", "peer", "msg_id", "vital", "intent", "urgency", "body")
+MessageRow = tuple[int, str, str, int, bool, str, int, str]
+MESSAGE_CACHE_MAX = 500  # history rows kept per node; the oldest indices are dropped first
+
+# Command verb -> (expected reply prefixes, reply timeout, attempts) for send_command.
+_CMD_SPEC: dict[str, tuple[tuple[str, ...], float, int]] = {
+    "WHOAMI": (("OK|WHOAMI|",), BLE_TIMEOUT_NORMAL, 2),
+    "STATUS": (("OK|STATUS|",), BLE_TIMEOUT_NORMAL, 2),
+    "NAME": (("OK|NAME|",), BLE_TIMEOUT_NORMAL, 2),
+    "SEND": (("OK|SEND|", "ERR|SEND|"), BLE_TIMEOUT_NORMAL, 2),
+    "HISTCOUNT": (("OK|HISTCOUNT|",), BLE_TIMEOUT_NORMAL, 2),
+    "HISTGET": (("OK|HIST|", "ERR|HIST|"), BLE_TIMEOUT_NORMAL, 2),
+    "MEMCOUNT": (("OK|MEMCOUNT|",), BLE_TIMEOUT_NORMAL, 2),
+    "MEMGET": (("OK|MEM|", "ERR|MEM|"), BLE_TIMEOUT_NORMAL, 2),
+    # Streamed history: wait for the end marker (or older firmware's ERR|CMD|unknown)
+    "HISTBATCH": (("OK|HISTEND|", "ERR|CMD|"), BLE_TIMEOUT_NORMAL + BLE_PIPELINE_PER_ITEM_S * HISTBATCH_MAX_ENTRIES, 1),
+    "HISTALL": (("OK|HISTEND|", "ERR|CMD|"), BLE_TIMEOUT_NORMAL + BLE_PIPELINE_PER_ITEM_S * HISTORY_MAX_ENTRIES, 1),
+}
+_CMD_SPEC_DEFAULT: tuple[tuple[str, ...], float, int] = ((), BLE_TIMEOUT_NORMAL, 2)
+
+
+@lru_cache(maxsize=512)
+def _encode(command: str) -> bytes:
+  """Wire bytes for a polled or indexed command (HISTCOUNT, HISTGET|n, ...), which repeat
+  every poll. Sized to hold a full 200-member MEMGET sweep, which a smaller LRU would
+  cycle through without a single hit. One-off commands (SEND|peer|text, NAME|...) are
+  encoded directly so they don't push these out."""
+  return command.encode("utf-8")
+
 
 @dataclass
 class GatewayState:
@@ -66,26 +128,92 @@ class GatewayState:
   hop_frequency_mhz: float = 0.0
   last_response: str = ""
 
+  def to_dict(self) -> dict[str, Any]:
+    return {
+        "connected": self.connected,
+        "ble_name": self.ble_name,
+        "ble_address": self.ble_address,
+        "node_id": self.node_id,
+        "node_name": self.node_name,
+        "hop_leader": self.hop_leader,
+        "hop_seed": self.hop_seed,
+        "hop_seq": self.hop_seq,
+        "hop_channel": self.hop_channel,
+        "hop_frequency_mhz": self.hop_frequency_mhz,
+        "last_response": self.last_response,
+    }
+
+
+class ConnectBody(msgspec.Struct):
+  address: Annotated[str, msgspec.Meta(min_length=2)]
+
+
+class CommandBody(msgspec.Struct):
+  command: Annotated[str, msgspec.Meta(min_length=1, max_length=512)]
 
-class ConnectBody(BaseModel):
-  address: str = Field(min_length=2)
 
+_Body = TypeVar("_Body", bound=msgspec.Struct)
 
-class CommandBody(BaseModel):
-  command: str = Field(min_length=1, max_length=512)
+
+async def _decode_body(request: Request, body_type: type[_Body]) -> _Body:
+  """Decode and validate a JSON request body; malformed bodies are a 422 like FastAPI's own."""
+  try:
+    return msgspec.json.decode(await request.body(), type=body_type)
+  except msgspec.DecodeError as exc:  # ValidationError is a DecodeError
+    raise HTTPException(status_code=422, detail=str(exc))
 
 
 class BleGateway:
   def __init__(self) -> None:
     self._client: BleakClient | None = None
-    self._rx_char: Any = None
-    self._tx_char: Any = None
+    # NUS characteristics resolved once at connect; writes pass the object itself, which
+    # bleak hands straight to the backend (a UUID or handle is looked up on every write).
+    self._rx_char: BleakGATTCharacteristic | None = None
+    self._tx_char: BleakGATTCharacteristic | None = None
     self._state = GatewayState()
-    self._logs: deque[str] = deque(maxlen=300)
-    self._response_event = asyncio.Event()
+    # state() result; _update_state patches it in place, _reset_state drops it
+    self._state_dict: dict[str, Any] | None = None
+    # Fixed ring of log lines; _log_head is the next slot to overwrite.
+    self._logs: list[str | None] = [None] * LOG_CAPACITY
+    self._log_head = 0
+    self._ts_epoch = -1
+    self._ts_str = ""
+    # Lines waiting to be echoed to stdout by _echo_worker
+    self._echo: queue.SimpleQueue[str] = queue.SimpleQueue()
+    threading.Thread(target=self._echo_worker, name="gateway-log-echo", daemon=True).start()
+    # Reply the in-flight command is waiting for: (accepted prefixes, future). Set per
+    # attempt by _send_and_wait_unlocked and completed by the first matching line.
+    self._expect: tuple[tuple[str, ...], asyncio.Future[str]] | None = None
+    # In-flight indexed requests: ("HIST" | "MEM", idx) -> reply future
+    self._pending: dict[tuple[str, int], asyncio.Future[bytes]] = {}
     self._recent_devices: dict[str, tuple[dict[str, Any], float]] = {}
-    self._message_cache: dict[str, dict[int, dict[str, Any]]] = {}
-    self._member_cache: list[dict[str, Any]] = []
+    # (seen_at, addr) for every _recent_devices timestamp, oldest first; stale pairs are
+    # skipped when popped.
+    self._recent_heap: list[tuple[float, str]] = []
+    # Last BLEDevice seen per address, so connect() can skip find_device_by_address
+    self._ble_devices: dict[str, BLEDevice] = {}
+    # Long-lived scanner started with the app (None if it couldn't start); feeds _on_advert
+    self._scanner: BleakScanner | None = None
+    # Scan in progress; concurrent /devices calls share it instead of starting another
+    self._scan_task: asyncio.Task[list[dict[str, Any]]] | None = None
+    # History / member fetch in progress; concurrent polls share it instead of queueing
+    # a second full round of BLE requests behind the lock
+    self._messages_task: asyncio.Task[list[MessageRow]] | None = None
+    self._members_task: tuple[int, asyncio.Task[tuple[dict[str, Any], ...]]] | None = None
+    # Last fetched results with their expiry: (expires_at, rows) / (expires_at, limit, members)
+    self._messages_fresh: tuple[float, list[MessageRow]] | None = None
+    self._members_fresh: tuple[float, int, tuple[dict[str, Any], ...]] | None = None
+    self._message_cache: dict[str, dict[int, MessageRow]] = {}
+    # Auto-ACKs still to send as (node address, history idx, peer, body), drained by _ack_task
+    self._ack_backlog: list[tuple[str, int, str, str]] = []
+    self._ack_task: asyncio.Task[None] | None = None
+    self._member_cache: tuple[dict[str, Any], ...] = ()
+    # Smoothed reply round-trip per indexed command (HISTGET, MEMGET); sets the retry back-off
+    self._rtt: dict[str, float] = {}
+    # Cleared when the connected firmware answers HISTBATCH with ERR|CMD|unknown
+    self._histbatch = True
+    # Indexed writes in flight at once: 1 until the firmware shows it queues writes
+    self._pipeline_window = 1
 
     # Train triage classifiers at startup
     print("Training triage models...")
@@ -95,165 +223,354 @@ class BleGateway:
     print("Triage models ready.")
 
   def _log(self, line: str) -> None:
-    ts = time.strftime("%H:%M:%S")
-    self._logs.appendleft(f"[{ts}] {line}")
-    print(f"log: {line}")
+    now = int(time.time())
+    if now != self._ts_epoch:  # format the timestamp once per second, not per line
+      self._ts_epoch = now
+      self._ts_str = time.strftime("%H:%M:%S", time.localtime(now))
+    self._logs[self._log_head] = f"[{self._ts_str}] {line}"
+    self._log_head = (self._log_head + 1) % LOG_CAPACITY
+    self._echo.put(line)
+
+  def _echo_worker(self) -> None:
+    """Echo log lines to stdout from a thread, so a slow terminal or pipe never blocks
+    the event loop that delivers BLE notifications."""
+    while True:
+      line = self._echo.get()
+      sys.stdout.write(f"log: {line}\n")
+      if self._echo.empty():
+        sys.stdout.flush()
+
+  def _update_state(self, **changes: Any) -> None:
+    for name, value in changes.items():
+      setattr(self._state, name, value)
+    # Every RX line changes last_response; patch the cached dict rather than rebuild it.
+    if self._state_dict is not None:
+      self._state_dict.update(changes)
+
+  def _reset_state(self) -> None:
+    self._state = GatewayState()
+    self._state_dict = None
 
   def _on_disconnect(self, _client: BleakClient) -> None:
-    self._state.connected = False
+    self._update_state(connected=False)
     self._log("BLE disconnected.")
 
   def _on_notify(self, _sender: int, data: bytearray) -> None:
+    # Pipelined OK|HIST / OK|MEM replies are routed on the raw bytes; the fetch that asked
+    # for them decodes only the fields it keeps.
+    if self._pending and data.startswith((b"OK|HIST|", b"OK|MEM|")) and self._resolve_raw(data):
+      return
     text = data.decode("utf-8", errors="replace").strip()
     if not text:
       return
-    self._state.last_response = text
+    self._update_state(last_response=text)
     self._log(f"RX {self._state.ble_address}: {text}")
-    self._response_event.set()
-
-    if text.startswith("OK|WHOAMI|"):
-      parts = text.split("|")
-      if len(parts) >= 4:
-        self._state.node_id = parts[2].upper()
-        self._state.node_name = parts[3]
-    elif text.startswith("OK|NAME|"):
-      parts = text.split("|")
-      if len(parts) >= 3:
-        self._state.node_name = parts[2]
-    elif text.startswith("OK|STATUS|"):
-      parts = text.split("|")
-      # OK|STATUS|id|name|leader|seed|seq|channel|freq
-      if len(parts) >= 9:
-        self._state.node_id = parts[2].upper()
-        self._state.node_name = parts[3]
-        self._state.hop_leader = parts[4].upper()
-        self._state.hop_seed = parts[5].upper()
-        try:
-          self._state.hop_seq = int(parts[6])
-          self._state.hop_channel = int(parts[7])
-          self._state.hop_frequency_mhz = float(parts[8])
-        except ValueError:
-          pass
 
-  async def scan(self, timeout: float = 2.2) -> list[dict[str, Any]]:
-    rounds = max(1, min(3, int(timeout // 1) + 1))
-    per_round = max(0.6, min(1.2, timeout / rounds))
-    for _ in range(rounds):
-      devices = await BleakScanner.discover(timeout=per_round)
-      now = time.time()
-      for d in devices:
-        uuids = {(u or "").lower() for u in (d.metadata.get("uuids") or [])}
-        name = d.name or d.metadata.get("local_name") or ""
-        addr = (d.address or "").upper()
-        looks_esp32 = any(addr.startswith(prefix) for prefix in KNOWN_ESP32_OUI_PREFIXES)
-        if NUS_SERVICE_UUID in uuids or name.startswith("LifeLink") or looks_esp32:
-          self._recent_devices[d.address] = (
-              {
-                  "name": name or "LifeLink",
-                  "address": d.address,
-                  "rssi": d.rssi,
-              },
-              now,
-          )
-      await asyncio.sleep(0.05)
+    # One split per notification; the longest reply (OK|HIST|...) has 10 fields.
+    parts = text.split("|", 9)
+    if len(parts) < 2:
+      return
+    if self._pending and parts[0] == "ERR" and parts[1] in ("HIST", "MEM") and self._resolve_err(parts[1], text):
+      return
+    expect = self._expect
+    if expect is not None and text.startswith(expect[0]):
+      self._expect = None
+      if not expect[1].done():
+        expect[1].set_result(text)
+    if parts[0] == "OK":
+      handler = _NOTIFY_HANDLERS.get(parts[1])
+      if handler is not None:
+        handler(self, parts)
+
+  def _resolve_raw(self, data: bytearray) -> bool:
+    """Complete the pipelined request an OK|HIST|idx / OK|MEM|idx reply answers with the
+    raw reply bytes. Returns False if no request was waiting for that index."""
+    raw = bytes(data).rstrip()
+    parts = raw.split(b"|", 3)
+    if len(parts) < 4 or not parts[2].isdigit():
+      return False
+    verb = parts[1].decode("ascii")
+    fut = self._pending.pop((verb, int(parts[2])), None)
+    if fut is None or fut.done():
+      return False
+    fut.set_result(raw)
+    self._log(f"RX {self._state.ble_address}: OK|{verb}|{int(parts[2])}|...")
+    return True
+
+  def _resolve_err(self, verb: str, text: str) -> bool:
+    """ERR|HIST|... / ERR|MEM|... carry no index; the firmware answers in order, so they
+    go to the oldest outstanding request of that kind."""
+    # _pending is in write order (a retry re-inserts its key)
+    key = next((k for k in self._pending if k[0] == verb), None)
+    fut = self._pending.pop(key, None) if key is not None else None
+    if fut is None or fut.done():
+      return False
+    fut.set_result(text.encode("utf-8"))
+    return True
+
+  def _on_whoami(self, parts: list[str]) -> None:
+    # OK|WHOAMI|id|name
+    if len(parts) >= 4:
+      self._update_state(node_id=parts[2].upper(), node_name=parts[3])
+
+  def _on_name(self, parts: list[str]) -> None:
+    # OK|NAME|name
+    if len(parts) >= 3:
+      self._update_state(node_name=parts[2])
+
+  def _on_send(self, parts: list[str]) -> None:
+    # OK|SEND|queued: the sent message is a new history row
+    self._messages_fresh = None
+
+  def _on_status(self, parts: list[str]) -> None:
+    # OK|STATUS|id|name|leader|seed|seq|channel|freq
+    if len(parts) >= 9:
+      self._update_state(
+          node_id=parts[2].upper(),
+          node_name=parts[3],
+          hop_leader=parts[4].upper(),
+          hop_seed=parts[5].upper(),
+      )
+      try:
+        self._update_state(hop_seq=int(parts[6]), hop_channel=int(parts[7]), hop_frequency_mhz=float(parts[8]))
+      except ValueError:
+        pass
 
+  def _on_advert(self, device: BLEDevice, adv: AdvertisementData) -> None:
+    name = adv.local_name or device.name or ""
+    addr = (device.address or "").upper()  # addresses are kept upper-case from here on
+    # Cheapest checks first; the advertised UUID list is only searched as a last resort.
+    # Every bleak backend reports service_uuids lower-case, so plain membership will do.
+    if not (
+        name.startswith("LifeLink")
+        or addr.startswith(KNOWN_ESP32_OUI_PREFIXES)
+        or NUS_SERVICE_UUID in adv.service_uuids
+    ):
+      return
+    self._ble_devices[addr] = device
+    seen = self._recent_devices.get(addr)
+    if seen is None:
+      self._remember_device({"name": name or "LifeLink", "address": addr, "rssi": adv.rssi})
+      return
+    # Device already cached (earlier advert or scan): reuse its dict, refresh the live fields.
+    entry, seen_at = seen
+    entry["rssi"] = adv.rssi
+    if name:
+      entry["name"] = name
     now = time.time()
-    fresh: list[dict[str, Any]] = []
-    for addr, (entry, seen_at) in list(self._recent_devices.items()):
-      if now - seen_at <= DEVICE_CACHE_TTL_S:
-        fresh.append(entry)
-      else:
+    if now - seen_at >= 1.0:  # the TTL is minutes; no need to re-stamp more than once a second
+      self._remember_device(entry, now)
+
+  def _remember_device(self, entry: dict[str, Any], now: float | None = None) -> None:
+    seen_at = time.time() if now is None else now
+    self._recent_devices[entry["address"]] = (entry, seen_at)
+    heap = self._recent_heap
+    heapq.heappush(heap, (seen_at, entry["address"]))
+    # The background scanner re-stamps devices whether or not /devices is ever polled,
+    # so expire and compact here too: every re-stamp leaves a stale pair behind.
+    self._expire_devices(seen_at)
+    if len(heap) > 2 * len(self._recent_devices) + 16:
+      heap[:] = [(t, addr) for addr, (_, t) in self._recent_devices.items()]
+      heapq.heapify(heap)
+
+  def _expire_devices(self, now: float) -> None:
+    """Drop devices not seen for DEVICE_CACHE_TTL_S; only expired heap entries are touched."""
+    cutoff = now - DEVICE_CACHE_TTL_S
+    heap = self._recent_heap
+    while heap and heap[0][0] < cutoff:
+      seen_at, addr = heapq.heappop(heap)
+      current = self._recent_devices.get(addr)
+      if current is not None and current[1] == seen_at:
         del self._recent_devices[addr]
+        self._ble_devices.pop(addr, None)
+
+  # Every start/stop of the background scanner happens under _ble_lock, so a /devices
+  # refresh can't restart discovery while connect() has it paused.
+
+  async def start_scanner(self) -> None:
+    """Keep one scanner running in the background so scan() can answer from _recent_devices."""
+    async with _ble_lock:
+      try:
+        scanner = BleakScanner(detection_callback=self._on_advert)
+        await scanner.start()
+      except Exception as exc:
+        self._log(f"Background scanner unavailable ({exc}); scanning per request.")
+        return
+      self._scanner = scanner
 
-    if self._state.connected and self._state.ble_address:
-      connected_addr = self._state.ble_address
-      if not any((d.get("address") or "").upper() == connected_addr.upper() for d in fresh):
-        cached = self._recent_devices.get(connected_addr)
-        cached_rssi = cached[0].get("rssi", 0) if cached else 0
-        fresh.append(
-            {
-                "name": self._state.node_name or "LifeLink",
-                "address": connected_addr,
-                "rssi": cached_rssi,
-            }
-        )
-
-    fresh.sort(key=lambda x: x.get("rssi", -999), reverse=True)
+  async def stop_scanner(self) -> None:
+    async with _ble_lock:
+      scanner, self._scanner = self._scanner, None
+      if scanner is not None:
+        try:
+          await scanner.stop()
+        except Exception:
+          pass
+
+  async def _pause_scanner(self) -> BleakScanner | None:
+    """Stop the background scanner for a connect or refresh and return it, or None if
+    there is none or it failed to stop (then per-request scanning takes over). Caller
+    holds ``_ble_lock``."""
+    scanner = self._scanner
+    if scanner is None:
+      return None
+    try:
+      await scanner.stop()
+    except Exception as exc:
+      self._scanner = None
+      self._log(f"Background scanner stopped ({exc}); scanning per request.")
+      return None
+    return scanner
+
+  async def _resume_scanner(self, scanner: BleakScanner) -> None:
+    """Restart the background scanner after a pause. Caller holds ``_ble_lock``."""
+    if self._scanner is not scanner:
+      return
+    try:
+      await scanner.start()
+    except Exception as exc:
+      self._scanner = None
+      self._log(f"Background scanner stopped ({exc}); scanning per request.")
+
+  async def scan(self, timeout: float = 2.2, refresh: bool = False) -> list[dict[str, Any]]:
+    if self._scanner is not None and not refresh:
+      return self._device_snapshot()
+    if self._scan_task is None or self._scan_task.done():
+      self._scan_task = asyncio.create_task(self._scan(timeout))
+    # shield: a caller that goes away must not cancel the scan the others are waiting on
+    return await asyncio.shield(self._scan_task)
+
+  async def _scan(self, timeout: float) -> list[dict[str, Any]]:
+    if self._scanner is not None:
+      # Explicit refresh: restart the background session and give it the window.
+      async with _ble_lock:
+        scanner = await self._pause_scanner()
+        if scanner is not None:
+          await self._resume_scanner(scanner)
+    if self._scanner is not None:
+      await asyncio.sleep(timeout)
+    else:
+      # One scanner session for the whole window; adverts land in _recent_devices as they arrive.
+      async with BleakScanner(detection_callback=self._on_advert):
+        await asyncio.sleep(timeout)
+    return self._device_snapshot()
+
+  def _device_snapshot(self) -> list[dict[str, Any]]:
+    self._expire_devices(time.time())
+    fresh = [entry for entry, _ in self._recent_devices.values()]
+
+    # Keep the connected node listed even when it stopped advertising (addresses are
+    # upper-case keys, so this is a dict lookup rather than a pass over `fresh`).
+    connected_addr = self._state.ble_address
+    if self._state.connected and connected_addr and connected_addr not in self._recent_devices:
+      fresh.append({"name": self._state.node_name or "LifeLink", "address": connected_addr, "rssi": 0})
+
+    fresh.sort(key=itemgetter("rssi"), reverse=True)
     return fresh
 
   async def connect(self, address: str) -> None:
+    address = address.upper()
     # -- Connection setup under lock (all BLE adapter access) ---------------
     async with _ble_lock:
       if (
           self._client is not None
           and self._client.is_connected
           and self._state.connected
-          and self._state.ble_address.upper() == address.upper()
+          and self._state.ble_address == address
       ):
         self._log(f"Already connected to {address}.")
         return
 
       # Non-blocking disconnect of previous connection
+      had_client = self._client is not None
       await self._disconnect_inner_fast()
-      # Brief pause to let BlueZ finish tearing down the old connection
-      await asyncio.sleep(0.3)
+      if had_client:
+        # Brief pause to let BlueZ finish tearing down the old connection
+        await asyncio.sleep(0.3)
 
       self._log(f"Connecting to {address}...")
 
-      # On Linux/BlueZ, BleakClient(address_str) can fail if the device isn't
-      # in the adapter cache. Use find_device_by_address to resolve first.
-      device = await BleakScanner.find_device_by_address(address, timeout=2.0)
-      if device is None:
-        raise RuntimeError(f"Device {address} not found. Try scanning first.")
-
-      client = BleakClient(device, disconnected_callback=self._on_disconnect)
+      # Some adapters abort LE connections while discovery is active; pause the
+      # background scanner until we are connected.
+      scanner = await self._pause_scanner()
       try:
-        await asyncio.wait_for(client.connect(timeout=3.0), timeout=4.0)
-        svcs = await client.get_services()
-        rx = svcs.get_characteristic(NUS_RX_UUID)
-        tx = svcs.get_characteristic(NUS_TX_UUID)
-        if rx is None or tx is None:
-          raise RuntimeError("NUS RX/TX characteristics not found on device.")
-
-        await client.start_notify(tx, self._on_notify)
-        self._client = client
-        self._rx_char = rx
-        self._tx_char = tx
-        self._state.connected = True
-        self._state.ble_address = address
-        self._state.ble_name = client.address
-        self._state.last_response = ""
-        self._member_cache = []
-        self._recent_devices[address] = (
-            {
-                "name": "LifeLink",
-                "address": address,
-                "rssi": 0,
-            },
-            time.time(),
-        )
-        self._log("BLE connected.")
+        await self._connect_device(address)
+      finally:
+        if scanner is not None:
+          await self._resume_scanner(scanner)
 
+      # -- Post-connect identity fetch, still under the connect lock ----------
+      try:
+        await self._send_and_wait_unlocked("WHOAMI", ("OK|WHOAMI|",), timeout=BLE_TIMEOUT_FIRST, attempts=1)
+      except Exception:
+        pass
+      try:
+        await self._send_and_wait_unlocked("STATUS", ("OK|STATUS|",), timeout=BLE_TIMEOUT_NORMAL, attempts=1)
       except Exception:
-        await self._disconnect_inner_fast()
-        raise
+        pass
+      await self._probe_rx_queue()
 
-    # -- Post-connect identity fetch (each acquires _ble_lock via
-    #    _send_and_wait_locked) ------------------------------------------------
+  async def _probe_rx_queue(self) -> None:
+    """Send an empty ``HISTBATCH|0|0``: firmware that answers it (``OK|HISTEND|0``) also
+    queues RX writes, so MEMGET/HISTGET can be pipelined from the first poll. Caller
+    holds ``_ble_lock``."""
     try:
-      await self._send_and_wait_locked("WHOAMI", ("OK|WHOAMI|",), timeout=BLE_TIMEOUT_FIRST, attempts=1)
+      reply = await self._send_and_wait_unlocked(
+          "HISTBATCH|0|0", ("OK|HISTEND|", "ERR|CMD|"), timeout=BLE_TIMEOUT_NORMAL, attempts=1,
+      )
     except Exception:
-      pass
+      return  # no answer: stay at one write at a time, HISTBATCH is retried on the next fetch
+    if reply.startswith("OK|"):
+      self._pipeline_window = BLE_PIPELINE_WINDOW
+    else:
+      self._histbatch = False
+      self._pipeline_window = 1
+
+  async def _connect_device(self, address: str) -> None:
+    """Resolve, connect and subscribe to one device. Caller holds ``_ble_lock``."""
+    # On Linux/BlueZ, BleakClient(address_str) can fail if the device isn't
+    # in the adapter cache. Reuse the BLEDevice from a recent advert, otherwise
+    # resolve it with find_device_by_address first.
+    device = self._ble_devices.get(address)
+    if device is None:
+      device = await BleakScanner.find_device_by_address(address, timeout=2.0)
+    if device is None:
+      raise RuntimeError(f"Device {address} not found. Try scanning first.")
+
+    # Only NUS is used, so don't enumerate the rest of the GATT database.
+    client = BleakClient(device, disconnected_callback=self._on_disconnect, services=[NUS_SERVICE_UUID])
     try:
-      await self._send_and_wait_locked("STATUS", ("OK|STATUS|",), timeout=BLE_TIMEOUT_NORMAL, attempts=1)
+      await asyncio.wait_for(client.connect(timeout=3.0), timeout=4.0)
+      try:
+        svcs = client.services  # discovered during connect()
+      except BleakError:
+        svcs = await client.get_services()
+      rx = svcs.get_characteristic(NUS_RX_UUID)
+      tx = svcs.get_characteristic(NUS_TX_UUID)
+      if rx is None or tx is None:
+        raise RuntimeError("NUS RX/TX characteristics not found on device.")
+
+      await client.start_notify(tx, self._on_notify)
+      self._client = client
+      self._rx_char = rx
+      self._tx_char = tx
+      self._update_state(connected=True, ble_address=address, ble_name=client.address, last_response="")
+      self._forget_polls()
+      self._histbatch = True
+      self._pipeline_window = 1
+      self._remember_device({"name": "LifeLink", "address": address, "rssi": 0})
+      self._log("BLE connected.")
+
     except Exception:
-      pass
+      self._ble_devices.pop(address, None)  # may be stale; resolve afresh next time
+      await self._disconnect_inner_fast()
+      raise
 
   async def _disconnect_inner_fast(self) -> None:
     """Quick disconnect — doesn't wait for BLE teardown."""
     if self._client is None:
-      self._state = GatewayState()
-      self._member_cache = []
+      self._reset_state()
+      self._forget_polls()
       return
 
     client = self._client
@@ -261,8 +578,8 @@ class BleGateway:
     self._client = None
     self._rx_char = None
     self._tx_char = None
-    self._state = GatewayState()
-    self._member_cache = []
+    self._reset_state()
+    self._forget_polls()
     self._log("BLE disconnecting...")
 
     # Fire-and-forget BLE teardown in background
@@ -284,11 +601,11 @@ class BleGateway:
       await self._disconnect_inner_fast()
 
   async def send_command(self, command: str) -> None:
+    verb, _, args = command.partition("|")
     # Triage SEND commands: classify text and send compact payload if vital
-    if command.startswith("SEND|"):
-      parts = command.split("|", 2)
-      if len(parts) == 3:
-        peer, text = parts[1], parts[2]
+    if verb == "SEND":
+      peer, sep, text = args.partition("|")
+      if sep:
         is_vital, payload = run_triage(text, self._vital_clf, self._intent_clf, self._urg_clf)
         if is_vital and payload:
           self._log(f"TRIAGE: VITAL -> {payload}")
@@ -296,28 +613,34 @@ class BleGateway:
         else:
           self._log(f"TRIAGE: normal chat, sending full text")
 
-    expected_prefixes: tuple[str, ...] = ()
-    timeout_s = BLE_TIMEOUT_NORMAL
-    attempts = 2
-    if command == "WHOAMI":
-      expected_prefixes = ("OK|WHOAMI|",)
-    elif command == "STATUS":
-      expected_prefixes = ("OK|STATUS|",)
-    elif command.startswith("NAME|"):
-      expected_prefixes = ("OK|NAME|",)
-    elif command.startswith("SEND|"):
-      expected_prefixes = ("OK|SEND|", "ERR|SEND|")
-    elif command == "HISTCOUNT":
-      expected_prefixes = ("OK|HISTCOUNT|",)
-    elif command.startswith("HISTGET|"):
-      expected_prefixes = ("OK|HIST|", "ERR|HIST|")
-    elif command == "MEMCOUNT":
-      expected_prefixes = ("OK|MEMCOUNT|",)
-    elif command.startswith("MEMGET|"):
-      expected_prefixes = ("OK|MEM|", "ERR|MEM|")
+    expected_prefixes, timeout_s, attempts = _CMD_SPEC.get(verb, _CMD_SPEC_DEFAULT)
     await self._send_and_wait_locked(command, expected_prefixes, timeout=timeout_s, attempts=attempts)
 
-  async def fetch_messages(self) -> list[dict[str, Any]]:
+  def _forget_polls(self) -> None:
+    """Drop the member list, the TTL'd poll results and unsent auto-ACKs (new or no device)."""
+    self._member_cache = ()
+    self._ack_backlog.clear()
+    self._messages_fresh = None
+    self._members_fresh = None
+
+  async def fetch_messages(self) -> list[MessageRow]:
+    fresh = self._messages_fresh
+    if fresh is not None and time.monotonic() < fresh[0]:
+      return fresh[1]
+    if self._messages_task is None or self._messages_task.done():
+      self._messages_task = asyncio.create_task(self._fetch_messages())
+    # shield: a poll that goes away must not cancel the fetch the others are waiting on
+    return await asyncio.shield(self._messages_task)
+
+  async def _fetch_messages(self) -> list[MessageRow]:
+    # HISTCOUNT and the history fetch go out under one lock hold.
+    async with _ble_lock:
+      rows = await self._fetch_messages_unlocked()
+      if self._client is not None:
+        self._messages_fresh = (time.monotonic() + POLL_CACHE_TTL_S, rows)
+      return rows
+
+  async def _fetch_messages_unlocked(self) -> list[MessageRow]:
     WINDOW = 5  # only keep track of the last N messages
 
     addr = self._state.ble_address
@@ -327,7 +650,7 @@ class BleGateway:
       return self._last_n_cached(cache, WINDOW)
 
     try:
-      resp = await self._send_and_wait_locked("HISTCOUNT", ("OK|HISTCOUNT|",), timeout=BLE_TIMEOUT_NORMAL, attempts=2)
+      resp = await self._send_and_wait_unlocked("HISTCOUNT", ("OK|HISTCOUNT|",), timeout=BLE_TIMEOUT_NORMAL, attempts=2)
     except Exception:
       return self._last_n_cached(cache, WINDOW)
 
@@ -353,118 +676,168 @@ class BleGateway:
     # Fetch only the missing indices — only cache successful results
     new_count = 0
     failed: list[int] = []
-    for idx in missing:
+    replies: dict[int, bytes] = {}
+    if self._histbatch:
       try:
-        resp = await self._send_and_wait_locked(f"HISTGET|{idx}", ("OK|HIST|",), timeout=BLE_TIMEOUT_FAST, attempts=5)
+        batch = await self._request_hist_batch(missing[0], missing[-1] - missing[0] + 1, timeout=BLE_TIMEOUT_NORMAL)
       except Exception:
+        batch = {}
+      if batch is None:
+        self._histbatch = False
+        self._pipeline_window = 1
+        self._log("Firmware has no HISTBATCH; fetching history per index.")
+      else:
+        replies = batch
+    # Whatever the batch didn't deliver (old firmware, dropped notifications) goes per index.
+    rest = [i for i in missing if i not in replies]
+    if rest:
+      try:
+        replies.update(await self._request_indexed("HISTGET", "HIST", rest, timeout=BLE_TIMEOUT_FAST, attempts=5))
+      except Exception:
+        pass  # link went away; whatever isn't in `replies` counts as failed below
+    for idx in missing:
+      resp = replies.get(idx)
+      row = resp.split(b"|", 9) if resp is not None else []
+      # OK|HIST|idx|dir|peer|msg|vital|intent|urg|hexbody  (10 fields, ASCII up to the body)
+      if len(row) < 10 or row[0] != b"OK":
         failed.append(idx)
         continue
-      row = resp.split("|")
-      # OK|HIST|idx|dir|peer|msg|vital|intent|urg|hexbody  (10 fields)
-      if len(row) < 10:
-        failed.append(idx)
-        continue
-      hex_body = row[9]
       try:
-        body = bytes.fromhex(hex_body).decode("utf-8", errors="replace")
-      except ValueError:
+        body = a2b_hex(row[9]).decode("utf-8", errors="replace") if row[9] else ""
+      except ValueError:  # binascii.Error: odd length or non-hex digit
         body = ""
-      cache[idx] = {
-          "idx": int(row[2]),
-          "direction": row[3],
-          "peer": row[4].upper(),
-          "msg_id": int(row[5]),
-          "vital": row[6] == "1",
-          "intent": row[7],
-          "urgency": int(row[8]),
-          "body": body,
-      }
+      cache[idx] = (
+          int(row[2]),
+          row[3].decode("ascii", errors="replace"),
+          row[4].decode("ascii", errors="replace").upper(),
+          int(row[5]),
+          row[6] == b"1",
+          row[7].decode("ascii", errors="replace"),
+          int(row[8]),
+          body,
+      )
       new_count += 1
 
+    if len(cache) > MESSAGE_CACHE_MAX:
+      for idx in heapq.nsmallest(len(cache) - MESSAGE_CACHE_MAX, cache):
+        del cache[idx]
     self._message_cache[addr] = cache
 
     # Log results
     if new_count > 0 or failed:
       self._log(f"--- Fetched {new_count} new, {len(failed)} failed, cached {len(cache)}/{count} for {addr} ---")
-      for idx in sorted(missing):
-        if idx in cache:
-          m = cache[idx]
-          direction = "SENT" if m["direction"] == "S" else "RECV"
-          vital_tag = " [VITAL]" if m["vital"] else ""
-          self._log(
-              f"  #{m['idx']} {direction} peer={m['peer']} "
-              f"msg_id={m['msg_id']}{vital_tag} "
-              f"intent={m['intent']} urg={m['urgency']} "
-              f"body=\"{m['body']}\""
-          )
-        else:
-          self._log(f"  #{idx} <err>")
-      self._log("--- End new messages ---")
+      if LOG_MESSAGES:
+        for idx in sorted(missing):
+          if idx in cache:
+            m_idx, m_dir, m_peer, m_msg_id, m_vital, m_intent, m_urg, m_body = cache[idx]
+            direction = "SENT" if m_dir == "S" else "RECV"
+            vital_tag = " [VITAL]" if m_vital else ""
+            self._log(
+                f"  #{m_idx} {direction} peer={m_peer} "
+                f"msg_id={m_msg_id}{vital_tag} "
+                f"intent={m_intent} urg={m_urg} "
+                f"body=\"{m_body}\""
+            )
+          else:
+            self._log(f"  #{idx} <err>")
+        self._log("--- End new messages ---")
 
     # Auto-ACK: for each newly fetched *received* message whose body
     # doesn't start with "<ACK>", send back an acknowledgement.
     # The cache prevents re-ACKing — once fetched, the index won't
-    # appear in `missing` again.
+    # appear in `missing` again. The ACKs go out from a background task that
+    # takes the lock per SEND, so this poll doesn't wait on their replies.
     for idx in sorted(missing):
       m = cache.get(idx)
       if m is None:
         continue
-      if m["direction"] != "R":
+      _, direction, peer, _, _, _, _, body = m
+      if direction != "R":
         continue
-      if m["body"].startswith("<ACK>"):
+      if body.startswith("<ACK>"):
         continue
-      peer = m["peer"]
-      preview = m["body"][:3]
-      ack_body = f"<ACK>{preview}"
-      try:
-        self._log(f"Auto-ACK to {peer}: {ack_body}")
-        await self._send_and_wait_locked(
-            f"SEND|{peer}|{ack_body}",
-            ("OK|SEND|", "ERR|SEND|"),
-            timeout=BLE_TIMEOUT_NORMAL, attempts=2,
-        )
-      except Exception as exc:
-        self._log(f"Auto-ACK failed for #{idx}: {exc}")
+      preview = body[:3]
+      self._ack_backlog.append((addr, idx, peer, f"<ACK>{preview}"))
+    if self._ack_backlog and (self._ack_task is None or self._ack_task.done()):
+      self._ack_task = asyncio.create_task(self._send_acks())
 
     # Return only the last WINDOW messages
     return self._last_n_cached(cache, WINDOW)
 
+  async def _send_acks(self) -> None:
+    """Send queued auto-ACKs one at a time, taking ``_ble_lock`` per SEND so user
+    commands and polls can go out in between."""
+    while self._ack_backlog:
+      async with _ble_lock:
+        if not self._ack_backlog:
+          return  # cleared by a connect/disconnect while we waited for the lock
+        addr, idx, peer, ack_body = self._ack_backlog.pop(0)
+        if addr != self._state.ble_address:
+          continue  # queued for a node we're no longer connected to
+        try:
+          self._log(f"Auto-ACK to {peer}: {ack_body}")
+          await self._send_and_wait_unlocked(
+              f"SEND|{peer}|{ack_body}",
+              ("OK|SEND|", "ERR|SEND|"),
+              timeout=BLE_TIMEOUT_NORMAL, attempts=2,
+          )
+        except Exception as exc:
+          self._log(f"Auto-ACK failed for #{idx}: {exc}")
+
   @staticmethod
-  def _last_n_cached(cache: dict[int, dict[str, Any]], n: int) -> list[dict[str, Any]]:
+  def _last_n_cached(cache: dict[int, MessageRow], n: int) -> list[MessageRow]:
     """Return the last *n* entries from the cache, sorted by index."""
     if not cache:
       return []
-    keys = sorted(cache)
-    tail = keys[-n:] if len(keys) > n else keys
-    return [cache[k] for k in tail]
+    return [cache[k] for k in sorted(heapq.nlargest(n, cache))]
+
+  async def fetch_members(self, limit: int = 40) -> tuple[dict[str, Any], ...]:
+    fresh = self._members_fresh
+    if fresh is not None and fresh[1] == limit and time.monotonic() < fresh[0]:
+      return fresh[2]
+    inflight = self._members_task
+    if inflight is None or inflight[1].done() or inflight[0] != limit:
+      inflight = self._members_task = (limit, asyncio.create_task(self._fetch_members(limit)))
+    return await asyncio.shield(inflight[1])
+
+  async def _fetch_members(self, limit: int) -> tuple[dict[str, Any], ...]:
+    async with _ble_lock:
+      members = await self._fetch_members_unlocked(limit)
+      if self._client is not None:
+        self._members_fresh = (time.monotonic() + POLL_CACHE_TTL_S, limit, members)
+      return members
 
-  async def fetch_members(self, limit: int = 40) -> list[dict[str, Any]]:
+  async def _fetch_members_unlocked(self, limit: int) -> tuple[dict[str, Any], ...]:
     if self._client is None or not self._client.is_connected or self._rx_char is None:
-      return self._member_cache[:]
+      return self._member_cache
 
     try:
-      resp = await self._send_and_wait_locked("MEMCOUNT", ("OK|MEMCOUNT|",), timeout=BLE_TIMEOUT_NORMAL, attempts=2)
+      resp = await self._send_and_wait_unlocked("MEMCOUNT", ("OK|MEMCOUNT|",), timeout=BLE_TIMEOUT_NORMAL, attempts=2)
     except Exception:
-      return self._member_cache[:]
+      return self._member_cache
 
     parts = resp.split("|")
     if len(parts) < 3:
-      return self._member_cache[:]
+      return self._member_cache
     try:
       count = int(parts[2])
     except ValueError:
-      return self._member_cache[:]
+      return self._member_cache
 
     start = max(0, count - max(1, min(limit, 200)))
+    indices = list(range(start, count))
+    try:
+      replies = await self._request_indexed("MEMGET", "MEM", indices, timeout=BLE_TIMEOUT_FAST, attempts=2)
+    except Exception:
+      return self._member_cache
     out: list[dict[str, Any]] = []
-    for idx in range(start, count):
-      try:
-        resp = await self._send_and_wait_locked(f"MEMGET|{idx}", ("OK|MEM|",), timeout=BLE_TIMEOUT_FAST, attempts=2)
-      except Exception:
-        break
-      row = resp.split("|")
+    for idx in indices:
+      resp = replies.get(idx)
+      if resp is None:
+        continue
+      row = resp.decode("utf-8", errors="replace").split("|")
       # OK|MEM|idx|node_id|name|age_ms|hb_seq|seed|hops_away
-      if len(row) < 8:
+      if len(row) < 8 or row[0] != "OK":
         continue
       out.append(
           {
@@ -477,8 +850,9 @@ class BleGateway:
               "hops_away": int(row[8]) if len(row) > 8 else 1,
           }
       )
-    self._member_cache = out
-    return out
+    # Stored and handed out as a tuple so callers share it without copying.
+    self._member_cache = tuple(out)
+    return self._member_cache
 
   async def _send_and_wait_locked(
       self,
@@ -494,45 +868,203 @@ class BleGateway:
     captured from the device.
     """
     async with _ble_lock:
-      if self._client is None or not self._client.is_connected or self._rx_char is None:
-        raise RuntimeError("No BLE device connected.")
-
-      for attempt in range(attempts):
-        self._response_event.clear()
-        self._log(f"TX: {command}")
-        payload = command.encode("utf-8")
-        await asyncio.wait_for(self._client.write_gatt_char(self._rx_char, payload, response=False), timeout=1.5)
-        if not expected_prefixes:
-          return self._state.last_response
-        try:
-          await asyncio.wait_for(self._response_event.wait(), timeout=timeout)
-        except asyncio.TimeoutError:
-          if attempt + 1 == attempts:
-            raise RuntimeError(f"No response to '{command}'")
-          continue
-
-        if any(self._state.last_response.startswith(prefix) for prefix in expected_prefixes):
-          return self._state.last_response
+      return await self._send_and_wait_unlocked(command, expected_prefixes, timeout, attempts)
+
+  async def _send_and_wait_unlocked(
+      self,
+      command: str,
+      expected_prefixes: tuple[str, ...],
+      timeout: float,
+      attempts: int,
+  ) -> str:
+    """_send_and_wait_locked for callers that already hold ``_ble_lock``."""
+    if self._client is None or not self._client.is_connected or self._rx_char is None:
+      raise RuntimeError("No BLE device connected.")
+
+    loop = asyncio.get_running_loop()
+    # Only the bare polled verbs (WHOAMI, STATUS, HISTCOUNT, ...) repeat on this path.
+    payload = command.encode("utf-8") if "|" in command else _encode(command)
+    for attempt in range(attempts):
+      # Armed before the write so a reply that lands during the write isn't missed;
+      # lines that don't match (late replies, unrelated notifications) are ignored.
+      fut: asyncio.Future[str] = loop.create_future()
+      self._expect = (expected_prefixes, fut) if expected_prefixes else None
+      self._log(f"TX: {command}")
+      await self._write_rx(payload)
+      if not expected_prefixes:
+        return self._state.last_response
+      try:
+        reply = await asyncio.wait_for(fut, timeout=timeout)
+      except asyncio.TimeoutError:
         if attempt + 1 == attempts:
-          raise RuntimeError(f"Unexpected response '{self._state.last_response}' for '{command}'")
-        await asyncio.sleep(0.02)
+          raise RuntimeError(f"No response to '{command}'")
+        continue
+      finally:
+        if self._expect is not None and self._expect[1] is fut:
+          self._expect = None
+      return reply
 
-      return self._state.last_response
+    return self._state.last_response
+
+  async def _write_rx(self, payload: bytes) -> None:
+    """Write-without-response of one command to the NUS RX characteristic."""
+    client, rx_char = self._client, self._rx_char
+    if client is None or rx_char is None:
+      raise RuntimeError("No BLE device connected.")
+    await asyncio.wait_for(client.write_gatt_char(rx_char, payload, response=False), timeout=1.5)
+
+  async def _request_indexed(
+      self,
+      command: str,
+      reply_verb: str,
+      indices: list[int],
+      timeout: float,
+      attempts: int,
+  ) -> dict[int, bytes]:
+    """Send ``command|idx`` for every index with up to ``_pipeline_window`` writes in
+    flight, instead of one full round-trip per index.
+
+    Replies (``OK|<reply_verb>|idx|...``) are matched to their request by index in
+    ``_on_notify``. The caller holds ``_ble_lock``; the batch is bounded by
+    one full retry cycle plus a per-index budget so a dead link can't
+    hold the lock for ``len(indices) * attempts * timeout``. Returns the raw reply per
+    index; indices that never answered are missing from the result.
+    """
+    if self._client is None or not self._client.is_connected or self._rx_char is None:
+      raise RuntimeError("No BLE device connected.")
+    loop = asyncio.get_running_loop()
+    window_size = self._pipeline_window
+    window = asyncio.Semaphore(window_size)
+    per_item = BLE_PIPELINE_PER_ITEM_S * BLE_PIPELINE_WINDOW / window_size
+    deadline = loop.time() + attempts * timeout + per_item * len(indices)
+    link_error = False
+
+    async def _one(idx: int) -> tuple[int, bytes | None]:
+      nonlocal link_error
+      key = (reply_verb, idx)
+      line = f"{command}|{idx}"
+      payload = _encode(line)
+      async with window:
+        for attempt in range(attempts):
+          if attempt > 1:
+            # First retry goes out at once; after that back off in steps of the link's RTT.
+            rtt = self._rtt.get(command, timeout / 4)
+            await asyncio.sleep(min(rtt * 2 ** (attempt - 2), timeout / 4))
+          remaining = deadline - loop.time()
+          if remaining <= 0 or link_error:
+            break
+          fut: asyncio.Future[bytes] = loop.create_future()
+          self._pending[key] = fut
+          try:
+            self._log(f"TX: {line}")
+            await self._write_rx(payload)
+            sent_at = loop.time()
+            reply = await asyncio.wait_for(fut, timeout=min(timeout, remaining))
+            elapsed = loop.time() - sent_at
+            self._rtt[command] = 0.9 * self._rtt.get(command, elapsed) + 0.1 * elapsed
+            return idx, reply
+          except asyncio.TimeoutError:
+            continue
+          except Exception as exc:
+            # Write failed (link dropped, ...): this index is missing and the rest of
+            # the batch stops instead of writing after the caller has given up.
+            if not link_error:
+              link_error = True
+              self._log(f"{command} batch aborted: {exc}")
+            break
+          finally:
+            if self._pending.get(key) is fut:
+              del self._pending[key]
+      return idx, None
+
+    results = await asyncio.gather(*(_one(idx) for idx in indices))
+    return {idx: resp for idx, resp in results if resp is not None}
+
+  async def _request_hist_batch(self, start: int, count: int, timeout: float) -> dict[int, bytes] | None:
+    """Fetch history ``start .. start+count-1`` with one ``HISTBATCH|start|count`` write.
+
+    The firmware streams an ``OK|HIST|idx|...`` line per entry (matched by index in
+    ``_on_notify``, like pipelined HISTGET) and finishes with ``OK|HISTEND|n``. Returns
+    the rows that arrived before the end marker or the timeout, or None if the firmware
+    doesn't know the command. The end marker is waited for ``timeout`` plus BLE_PIPELINE_PER_ITEM_S per
+    requested line. The caller holds ``_ble_lock``.
+    """
+    if self._client is None or not self._client.is_connected or self._rx_char is None:
+      raise RuntimeError("No BLE device connected.")
+    loop = asyncio.get_running_loop()
+    futs: dict[int, asyncio.Future[bytes]] = {idx: loop.create_future() for idx in range(start, start + count)}
+    for idx, fut in futs.items():
+      self._pending[("HIST", idx)] = fut
+    end: asyncio.Future[str] = loop.create_future()
+    self._expect = (("OK|HISTEND|", "ERR|CMD|"), end)
+    try:
+      command = f"HISTBATCH|{start}|{count}"
+      self._log(f"TX: {command}")
+      await self._write_rx(_encode(command))
+      if (await asyncio.wait_for(end, timeout=timeout + BLE_PIPELINE_PER_ITEM_S * count)).startswith("ERR|CMD|"):
+        return None
+      # Firmware that knows HISTBATCH also queues RX writes, so pipeline from here on.
+      self._pipeline_window = BLE_PIPELINE_WINDOW
+    except asyncio.TimeoutError:
+      pass
+    finally:
+      if self._expect is not None and self._expect[1] is end:
+        self._expect = None
+      for idx, fut in futs.items():
+        if self._pending.get(("HIST", idx)) is fut:
+          del self._pending[("HIST", idx)]
+    return {idx: fut.result() for idx, fut in futs.items() if fut.done()}
 
   def clear_message_cache(self) -> None:
     """Wipe the per-device message cache for all devices."""
     self._message_cache.clear()
+    self._messages_fresh = None
     self._log("Message cache cleared.")
 
   def state(self) -> dict[str, Any]:
-    return asdict(self._state)
+    if self._state_dict is None:
+      self._state_dict = self._state.to_dict()
+    return self._state_dict
+
+  def logs(self, limit: int = 100) -> list[str]:
+    """Up to ``limit`` most recent log lines, newest first."""
+    head = self._log_head
+    ring = self._logs
+    out: list[str] = []
+    for i in range(min(limit, LOG_CAPACITY)):
+      line = ring[(head - 1 - i) % LOG_CAPACITY]
+      if line is None:  # ring not full yet
+        break
+      out.append(line)
+    return out
 
-  def logs(self) -> list[str]:
-    return list(self._logs)
 
+# OK|<verb>|... notifications that update gateway state, keyed by verb.
+_NOTIFY_HANDLERS = {
+    "WHOAMI": BleGateway._on_whoami,
+    "NAME": BleGateway._on_name,
+    "STATUS": BleGateway._on_status,
+    "SEND": BleGateway._on_send,
+}
 
 gateway = BleGateway()
-app = FastAPI(title="LifeLink BLE Gateway", version="0.1.0")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+  await gateway.start_scanner()
+  try:
+    yield
+  finally:
+    await gateway.stop_scanner()
+
+
+app = FastAPI(
+    title="LifeLink BLE Gateway",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
@@ -542,17 +1074,20 @@ app.add_middleware(
 )
 
 @app.get("/health")
-async def health() -> dict[str, Any]:
-  return {"ok": True, "busy": _ble_lock.locked(), "state": gateway.state()}
+async def health() -> ORJSONResponse:
+  return ORJSONResponse({"ok": True, "busy": _ble_lock.locked(), "state": gateway.state()})
 
 
 @app.get("/devices")
-async def devices(timeout: float = 2.2) -> dict[str, Any]:
-  return {"devices": await gateway.scan(timeout=max(0.6, min(timeout, 6.0)))}
+async def devices(timeout: float = 2.2, refresh: bool = False) -> dict[str, Any]:
+  # With the background scanner running this is a cache read; refresh=true restarts
+  # discovery and waits `timeout` for fresh adverts.
+  return {"devices": await gateway.scan(timeout=max(0.6, min(timeout, 6.0)), refresh=refresh)}
 
 
 @app.post("/connect")
-async def connect(body: ConnectBody) -> dict[str, Any]:
+async def connect(request: Request) -> dict[str, Any]:
+  body = await _decode_body(request, ConnectBody)
   try:
     await gateway.connect(body.address)
     return {"ok": True, "state": gateway.state()}
@@ -567,7 +1102,8 @@ async def disconnect() -> dict[str, Any]:
 
 
 @app.post("/command")
-async def command(body: CommandBody) -> dict[str, Any]:
+async def command(request: Request) -> dict[str, Any]:
+  body = await _decode_body(request, CommandBody)
   try:
     await gateway.send_command(body.command.strip())
     return {"ok": True}
@@ -576,8 +1112,11 @@ async def command(body: CommandBody) -> dict[str, Any]:
 
 
 @app.get("/state")
-async def state() -> dict[str, Any]:
-  return {"state": gateway.state(), "busy": _ble_lock.locked(), "logs": gateway.logs()}
+async def state(limit: int = 100) -> ORJSONResponse:
+  # Polled continuously by the UI; returning the response directly skips FastAPI's
+  # response-model validation and jsonable_encoder pass.
+  logs = gateway.logs(limit=max(0, min(limit, LOG_CAPACITY)))
+  return ORJSONResponse({"state": gateway.state(), "busy": _ble_lock.locked(), "logs": logs})
 
 
 @app.post("/clear-messages")
@@ -587,22 +1126,24 @@ async def clear_messages() -> dict[str, Any]:
 
 
 @app.get("/messages")
-async def messages() -> dict[str, Any]:
+async def messages() -> ORJSONResponse:
   try:
-    items = await gateway.fetch_messages()
-    return {"messages": items}
+    rows = await gateway.fetch_messages()
+    return ORJSONResponse({"columns": MESSAGE_COLUMNS, "rows": rows})
   except Exception as exc:
     raise HTTPException(status_code=400, detail=str(exc))
 
 
 @app.get("/members")
-async def members(limit: int = 40) -> dict[str, Any]:
+async def members(limit: int = 40) -> ORJSONResponse:
   try:
     items = await gateway.fetch_members(limit=max(1, min(limit, 200)))
-    return {"members": items}
+    return ORJSONResponse({"members": items})
   except Exception as exc:
     raise HTTPException(status_code=400, detail=str(exc))
 
 
 if __name__ == "__main__":
-  uvicorn.run(app, host="127.0.0.1", port=8765)
+  # loop/http "auto" pick uvloop and httptools when installed (uvloop is skipped on
+  # Windows); per-request access lines are noise for a localhost gateway.
+  uvicorn.run(app, host="127.0.0.1", port=8765, loop="auto", http="auto", access_log=False)